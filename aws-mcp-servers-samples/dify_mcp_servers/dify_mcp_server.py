@@ -1,44 +1,222 @@
-from typing import Any, Dict, Optional
-import httpx
-import json
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Optional, Union
+import aiohttp
+import orjson
+import simdjson
 from mcp.server.fastmcp import FastMCP
 
-# Initialize FastMCP server
-mcp = FastMCP("dify")
-
 # Constants
 DIFY_API_BASE = "https://api.dify.ai/v1"   # You can get it from dify console.
 DEFAULT_API_KEY = "API_KEY"  # You can get the API_KEY from dify console.
+MAX_RESPONSE_BYTES = 32 * 1024 * 1024  # Refuse to buffer responses larger than this
+READ_CHUNK_SIZE = 64 * 1024
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=60)
+HISTORY_TIMEOUT = aiohttp.ClientTimeout(total=30)
+_MODE_STREAM = sys.intern("streaming")
+_MODE_BLOCK = sys.intern("blocking")
+
+# Shared session so repeated tool calls reuse pooled keep-alive connections.
+# aiohttp sessions must be created inside the running loop, see _get_session().
+_session: Optional[aiohttp.ClientSession] = None
+
+# Precomposed URLs for the fixed POST endpoints
+_URLS = {
+    endpoint: f"{DIFY_API_BASE}/{endpoint}"
+    for endpoint in ("workflows/run", "chat-messages")
+}
+
+# Reusable parser for lazily reading only the fields we need from large responses.
+# A parser can only back one live document, so concurrent tool calls take the lock.
+_parser = simdjson.Parser()
+_parser_lock = asyncio.Lock()
+
+# Fixed-schema chat-messages body; only the variable fields are serialized per call
+_CHAT_TEMPLATE = b'{"inputs":{},"query":%s,"response_mode":"streaming"%s%s}'
+
+# Dify message roles are a small closed set; avoid calling .upper() per message
+_ROLE_UP = {"user": "USER", "assistant": "ASSISTANT", "system": "SYSTEM", "unknown": "UNKNOWN"}
+
+class DifyAPIError(Exception):
+    """Raised when a Dify API request fails."""
+    
+    def __init__(self, message: str, details: str = ""):
+        super().__init__(message)
+        self.message = message
+        self.details = details
+    
+    def __str__(self) -> str:
+        return f"{self.message}\n{self.details}"
+
+@lru_cache(maxsize=8)
+def _headers(api_key: str) -> Dict[str, str]:
+    """Build (once per API key) the request headers for the Dify API."""
+    return {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+
+@lru_cache(maxsize=32)
+def _empty_workflow_body(user_id: Optional[str]) -> bytes:
+    """Serialize (once per user_id) the run_workflow body for empty inputs."""
+    return orjson.dumps({"inputs": {}, "response_mode": _MODE_BLOCK, "user": user_id})
+
+def _url(endpoint: str) -> str:
+    """Return the absolute URL for a Dify API endpoint."""
+    return _URLS.get(endpoint) or f"{DIFY_API_BASE}/{endpoint}"
+
+def _get_session() -> aiohttp.ClientSession:
+    """Return the shared aiohttp session, creating it on first use."""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=64, keepalive_timeout=60),
+            timeout=REQUEST_TIMEOUT,
+            read_bufsize=READ_CHUNK_SIZE
+        )
+    return _session
+
+async def _raise_for_status(response: aiohttp.ClientResponse) -> None:
+    """Raise DifyAPIError with the response body if the status is an error."""
+    if response.status >= 400:
+        raise DifyAPIError(f"HTTP error: {response.status}", await response.text())
+
+def _role_label(role: Any) -> str:
+    """Return the upper-case display label for a message role."""
+    role = str(role)
+    return _ROLE_UP.get(role) or role.upper()
 
-async def make_dify_request(endpoint: str, data: Dict[str, Any], api_key: str = DEFAULT_API_KEY, streaming: bool = True) -> Dict[str, Any]:
+async def _read_body(response: aiohttp.ClientResponse) -> bytearray:
+    """Read a response body into a single buffer, enforcing MAX_RESPONSE_BYTES.
+    
+    Args:
+        response: An open aiohttp response
+    """
+    buf = bytearray()
+    async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+        buf += chunk
+        if len(buf) > MAX_RESPONSE_BYTES:
+            raise ValueError(f"Response exceeds {MAX_RESPONSE_BYTES} bytes")
+    return buf
+
+def _format_history(buf: bytearray) -> str:
+    """Parse a conversation history payload and format its messages.
+    
+    Must be called while holding _parser_lock. Everything needed is extracted
+    before returning, so no lazy proxy outlives the parse.
+    
+    Args:
+        buf: Raw JSON response body
+    """
+    doc = _parser.parse(buf)
+    
+    if "data" not in doc:
+        return "No conversation history found or error retrieving history."
+    
+    # Only read role/content straight from the lazy array; the rest of each
+    # message is never materialized, and no per-message string list is built
+    out = bytearray()
+    for msg in doc["data"]:
+        out += _role_label(msg.get("role", "unknown")).encode()
+        out += b": "
+        out += str(msg.get("content", "No content")).encode()
+        out += b"\n\n"
+    
+    return out[:-2].decode()
+
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """Open the shared HTTP session on startup and close it on shutdown."""
+    _get_session()
+    try:
+        yield
+    finally:
+        if _session is not None:
+            await _session.close()
+
+# Initialize FastMCP server
+mcp = FastMCP("dify", lifespan=lifespan)
+
+async def make_dify_request(endpoint: str, data: Union[Dict[str, Any], bytes], api_key: str = DEFAULT_API_KEY, streaming: bool = True) -> Dict[str, Any]:
     """Make a request to the Dify API with proper error handling.
     
     Args:
         endpoint: API endpoint to call
-        data: Request payload
+        data: Request payload, or an already-serialized JSON body (sent as-is)
         api_key: Dify API key
         streaming: Whether to use streaming response mode
+    
+    Raises:
+        DifyAPIError: If the request fails or returns an error status
     """
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
+    if isinstance(data, bytes):
+        body = data
+    else:
+        # Set response mode based on streaming parameter
+        data.setdefault("response_mode", _MODE_STREAM if streaming else _MODE_BLOCK)
+        body = orjson.dumps(data)
+    
+    try:
+        async with _get_session().post(_url(endpoint), headers=_headers(api_key), data=body) as response:
+            await _raise_for_status(response)
+            return orjson.loads(await _read_body(response))
+    except DifyAPIError:
+        raise
+    except Exception as e:
+        raise DifyAPIError(f"Request failed: {str(e)}") from e
+
+async def make_dify_stream_request(endpoint: str, data: Union[Dict[str, Any], bytes], api_key: str = DEFAULT_API_KEY) -> Dict[str, Any]:
+    """Make a streaming (SSE) request to the Dify API and assemble the answer.
     
-    # Set response mode based on streaming parameter
-    if "response_mode" not in data:
-        data["response_mode"] = "streaming" if streaming else "blocking"
+    Args:
+        endpoint: API endpoint to call
+        data: Request payload, or an already-serialized JSON body with
+              response_mode set to "streaming" (sent as-is)
+        api_key: Dify API key
     
-    url = f"{DIFY_API_BASE}/{endpoint}"
+    Returns:
+        A dict shaped like the blocking response ({"answer": ...})
     
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(url, headers=headers, json=data, timeout=60.0)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            return {"error": f"HTTP error: {e.response.status_code}", "details": e.response.text}
-        except Exception as e:
-            return {"error": f"Request failed: {str(e)}"}
+    Raises:
+        DifyAPIError: If the request fails or the stream reports an error
+    """
+    if isinstance(data, bytes):
+        body = data
+    else:
+        data["response_mode"] = _MODE_STREAM
+        body = orjson.dumps(data)
+    
+    parts = []
+    
+    try:
+        async with _get_session().post(_url(endpoint), headers=_headers(api_key), data=body) as response:
+            await _raise_for_status(response)
+            
+            async for line in response.content:
+                # SSE frames look like "data: {...}"; skip blank keep-alive lines
+                if not line.startswith(b"data:"):
+                    continue
+                
+                chunk = orjson.loads(line[5:])
+                event = chunk.get("event")
+                
+                if event in ("message", "agent_message"):
+                    parts.append(chunk.get("answer", ""))
+                elif event == "error":
+                    raise DifyAPIError(f"Stream error: {chunk.get('status', '')}", chunk.get("message", ""))
+                elif event == "message_end":
+                    break
+    except DifyAPIError:
+        raise
+    except Exception as e:
+        raise DifyAPIError(f"Request failed: {str(e)}") from e
+    
+    if not parts:
+        return {}
+    
+    return {"answer": "".join(parts)}
 
 @mcp.tool()
 async def run_workflow(inputs: Dict[str, str], user_id: Optional[str] = "abc-123", api_key: Optional[str] = None) -> str:
@@ -49,26 +227,26 @@ async def run_workflow(inputs: Dict[str, str], user_id: Optional[str] = "abc-123
         user_id: Optional user identifier for the request
         api_key: Optional API key to override the default
     """
-    data = {
-        "inputs": inputs,
-        "response_mode": "blocking",  # Using blocking for MCP tool response
-        "user": user_id
-    }
-    
-    result = await make_dify_request("workflows/run", data, api_key or DEFAULT_API_KEY, streaming=False)
+    if not inputs:
+        # Trigger-only runs always send the same body for a given user
+        data = _empty_workflow_body(user_id)
+    else:
+        data = {
+            "inputs": inputs,
+            "response_mode": _MODE_BLOCK,  # Using blocking for MCP tool response
+            "user": user_id
+        }
     
-    if "error" in result:
-        return f"Error: {result['error']}\n{result.get('details', '')}"
+    try:
+        result = await make_dify_request("workflows/run", data, api_key or DEFAULT_API_KEY, streaming=False)
+    except DifyAPIError as e:
+        return f"Error: {e}"
     
     # You shoud replace the output processing with your dify workflow input
     try:
-        if "data" in result and "outputs" in result["data"] and "advice" in result["data"]["outputs"]:
-            advice = result["data"]["outputs"]["advice"]
-            return advice
-        else:
-            return "No advice found in the response."
-    except Exception as e:
-        return f"Failed to parse response: {str(e)}"
+        return result["data"]["outputs"]["advice"]
+    except (KeyError, TypeError):
+        return "No advice found in the response."
 
 @mcp.tool()
 async def chat_completion(message: str, conversation_id: Optional[str] = None, 
@@ -81,29 +259,23 @@ async def chat_completion(message: str, conversation_id: Optional[str] = None,
         user_id: Optional user identifier for the request
         api_key: Optional API key to override the default
     """
-    data = {
-        "inputs": {},
-        "query": message,
-        "response_mode": "blocking"  # Using blocking for MCP tool response
-    }
-    
-    if user_id:
-        data["user"] = user_id
-    
-    if conversation_id:
-        data["conversation_id"] = conversation_id
+    # Stream so the answer is assembled as it is generated
+    data = _CHAT_TEMPLATE % (
+        orjson.dumps(message),
+        b',"user":' + orjson.dumps(user_id) if user_id else b"",
+        b',"conversation_id":' + orjson.dumps(conversation_id) if conversation_id else b""
+    )
     
-    result = await make_dify_request("chat-messages", data, api_key or DEFAULT_API_KEY, streaming=False)
-    
-    if "error" in result:
-        return f"Error: {result['error']}\n{result.get('details', '')}"
+    try:
+        result = await make_dify_stream_request("chat-messages", data, api_key or DEFAULT_API_KEY)
+    except DifyAPIError as e:
+        return f"Error: {e}"
     
     # Extract only the answer from the response
     try:
-        answer = result.get("answer", "No answer provided")
-        return answer
-    except Exception as e:
-        return f"Failed to parse response: {str(e)}"
+        return result["answer"]
+    except (KeyError, TypeError):
+        return "No answer provided"
 
 @mcp.tool()
 async def get_conversation_history(conversation_id: str, first_id: Optional[str] = None, 
@@ -125,34 +297,21 @@ async def get_conversation_history(conversation_id: str, first_id: Optional[str]
     if limit:
         params["limit"] = limit
     
-    headers = {
-        "Authorization": f"Bearer {api_key or DEFAULT_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    
-    url = f"{DIFY_API_BASE}/{endpoint}"
-    
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers, params=params, timeout=30.0)
+    try:
+        async with _get_session().get(_url(endpoint), headers=_headers(api_key or DEFAULT_API_KEY), params=params, timeout=HISTORY_TIMEOUT) as response:
             response.raise_for_status()
-            result = response.json()
-            
-            if "data" not in result:
-                return "No conversation history found or error retrieving history."
-            
-            messages = result["data"]
-            formatted_messages = []
-            
-            for msg in messages:
-                role = msg.get("role", "unknown")
-                content = msg.get("content", "No content")
-                formatted_messages.append(f"{role.upper()}: {content}")
-            
-            return "\n\n".join(formatted_messages)
-        except Exception as e:
-            return f"Failed to retrieve conversation history: {str(e)}"
+            buf = await _read_body(response)
+        
+        async with _parser_lock:
+            return _format_history(buf)
+    except Exception as e:
+        return f"Failed to retrieve conversation history: {str(e)}"
 
 if __name__ == "__main__":
-    # Initialize and run the server
-    mcp.run(transport='stdio')
+    # Run the server on the faster libuv-based event loop when available
+    try:
+        import uvloop
+    except ImportError:
+        mcp.run(transport='stdio')
+    else:
+        uvloop.run(mcp.run_stdio_async())
@@ -10,19 +10,156 @@ Run with:
 """
 
 import os
-import time
 import logging
 import asyncio
-import tempfile
+import threading
 import streamlit as st
 from strands import Agent, tool
+from strands.agent.agent_result import AgentResult
 from strands.models import BedrockModel
 from strands.agent.conversation_manager import SlidingWindowConversationManager
+from strands.tools.mcp import MCPAgentTool
 
 from strands_web_ui.mcp_server_manager import MCPServerManager
 from strands_web_ui.handlers.streamlit_handler import StreamlitHandler
 from strands_web_ui.utils.config_loader import load_config, load_mcp_config
-from strands_web_ui.utils.tool_loader import load_tools_from_config, get_available_tool_names
+from strands_web_ui.utils.tool_loader import load_tools_from_config, get_available_tool_names, clear_tool_cache
+
+# Import pre-built tools directly
+from strands_tools import (
+    calculator,
+    editor,
+    environment,
+    file_read,
+    file_write,
+    http_request,
+    python_repl,
+    shell,
+    think,
+    workflow  # Add workflow tool here
+)
+
+# Map tool names to actual tool objects
+_TOOL_MAP = {
+    "calculator": calculator,
+    "editor": editor,
+    "environment": environment,
+    "file_read": file_read,
+    "file_write": file_write,
+    "http_request": http_request,
+    "python_repl": python_repl,
+    "shell": shell,
+    "think": think,
+    "workflow": workflow  # Add workflow to the map
+}
+
+# Sidebar and upload dialog option lists (constant across reruns)
+_REGION_OPTIONS = ("us-east-1", "us-west-2", "eu-central-1", "ap-southeast-1")
+
+_MODEL_OPTIONS = (
+    "us.anthropic.claude-3-7-sonnet-20250219-v1:0",
+    "us.anthropic.claude-3-5-sonnet-20241022-v2:0",
+    "anthropic.claude-3-haiku-20240307-v1:0",
+    "us.anthropic.claude-3-5-haiku-20241022-v1:0",
+    "us.amazon.nova-premier-v1:0",
+    "us.amazon.nova-lite-v1:0",
+    "us.amazon.nova-pro-v1:0",
+    "us.meta.llama4-maverick-17b-instruct-v1:0",
+    "us.meta.llama4-scout-17b-instruct-v1:0"
+)
+
+_LANG_OPTIONS = ("en-US", "id-ID", "zh-CN", "ja-JP", "ko-KR", "th-TH")
+_LANG_DEFAULT = ("en-US", "id-ID")
+
+_TRANSCRIBE_REGION_OPTIONS = ("ap-southeast-1", "us-east-1", "us-west-2", "eu-central-1", "local")
+
+# Static CSS, built once at import instead of on every rerun
+_CSS = """
+<style>
+.media-upload-btn {
+    background-color: #f0f2f6;
+    border: 2px dashed #cccccc;
+    border-radius: 8px;
+    padding: 8px;
+    text-align: center;
+    cursor: pointer;
+    transition: all 0.3s ease;
+}
+.media-upload-btn:hover {
+    border-color: #4CAF50;
+    background-color: #f8fff8;
+}
+.attachment-info {
+    background-color: #e8f4fd;
+    border-left: 4px solid #2196F3;
+    padding: 10px;
+    margin: 10px 0;
+    border-radius: 4px;
+}
+.transcription-result {
+    background-color: #f0f8ff;
+    border: 1px solid #b3d9ff;
+    border-radius: 8px;
+    padding: 15px;
+    margin: 10px 0;
+}
+.step-indicator {
+    color: #666;
+    font-weight: bold;
+    margin-bottom: 10px;
+}
+</style>
+"""
+
+# HTML templates filled with str.format
+_THINKING_TMPL = """
+<div style="background-color: rgba(67, 97, 238, 0.1); padding: 10px; border-left: 4px solid #4361ee; border-radius: 4px; color: var(--text-color, currentColor);">
+{content}
+</div>
+"""
+
+_ATTACHMENT_TMPL = """
+<div class="attachment-info">
+    📎 <strong>Attached:</strong> {file_name}
+    <br><small>This audio file will be transcribed and included with your next message</small>
+</div>
+"""
+
+_TRANSCRIPT_TMPL = """
+<div class="transcription-result">
+<div class="step-indicator">🎤 Step 1/2: Audio Transcription Completed</div>
+
+<strong>📋 Transcription Results:</strong>
+<ul>
+<li><strong>Language Detected:</strong> {detected_language}</li>
+<li><strong>Confidence:</strong> {confidence}</li>
+<li><strong>File:</strong> {file_name}</li>
+</ul>
+
+<strong>📝 Transcript:</strong>
+<div style="background-color: white; padding: 10px; border-radius: 4px; margin: 10px 0; border-left: 4px solid #4CAF50;">
+<em>"{transcript}"</em>
+</div>
+
+<div class="step-indicator">🤖 Step 2/2: Processing with AI Agent...</div>
+</div>
+"""
+
+_TRANSCRIBE_FAILED_TMPL = """
+<div style="background-color: #fff3cd; border: 1px solid #ffeaa7; border-radius: 8px; padding: 15px; margin: 10px 0;">
+⚠️ <strong>Audio transcription failed:</strong> {message}
+<br><br>
+<em>Continuing with text input only...</em>
+</div>
+"""
+
+_AUDIO_ERROR_TMPL = """
+<div style="background-color: #f8d7da; border: 1px solid #f5c6cb; border-radius: 8px; padding: 15px; margin: 10px 0;">
+❌ <strong>Audio processing error:</strong> {error}
+<br><br>
+<em>Continuing with text input only...</em>
+</div>
+"""
 
 # Simple no-op handler for non-streaming mode
 class NoOpHandler:
@@ -32,7 +169,7 @@ class NoOpHandler:
 
 # Import audio transcription extensions
 try:
-    from strands_web_ui.extensions.audio_transcriber import transcribe_audio_file_sync, get_supported_languages
+    from strands_web_ui.extensions.audio_transcriber import transcribe_audio_bytes_async, get_supported_languages
     AUDIO_TRANSCRIPTION_AVAILABLE = True
 except ImportError as e:
     AUDIO_TRANSCRIPTION_AVAILABLE = False
@@ -44,32 +181,38 @@ logger = logging.getLogger(__name__)
 
 # Example tools can be defined here if needed
 
-def initialize_agent(config, mcp_manager=None):
+@st.cache_data(show_spinner=False)
+def _load_config_cached():
+    """Load the app configuration once; each caller gets its own copy."""
+    return load_config()
+
+@st.cache_data(show_spinner=False)
+def _tool_names_cached():
+    """List the available SDK tool names once per process."""
+    return tuple(get_available_tool_names())
+
+@st.cache_resource(show_spinner=False)
+def _build_model(model_id, region, enable_streaming, enable_native_thinking, thinking_budget, max_tokens):
     """
-    Initialize the Strands agent with the given configuration.
+    Create a BedrockModel, reusing an existing one for identical settings.
+    
+    The model (and its boto3 client) holds no conversation state, so it is
+    safe to share across reruns and sessions.
     
     Args:
-        config: Agent configuration
-        mcp_manager: MCP server manager for additional tools
+        model_id: Bedrock model identifier
+        region: AWS region
+        enable_streaming: Whether to stream model responses
+        enable_native_thinking: Whether to enable native thinking
+        thinking_budget: Token budget for thinking
+        max_tokens: Maximum tokens for the response
         
     Returns:
-        Agent: Initialized Strands agent
+        BedrockModel: The model instance
     """
-    # Create model based on config
-    model_config = config.get("model", {})
-    
-    # Get streaming preference from config
-    enable_streaming = model_config.get("enable_streaming", True)
-    
     # Add native thinking parameter if enabled
     additional_request_fields = {}
-    agent_config = config.get("agent", {})
-    if agent_config.get("enable_native_thinking", False):
-        # Get thinking budget from config or use default
-        thinking_budget = agent_config.get("thinking_budget", 16000)
-        # Get max_tokens from model config or use default (1.5x thinking budget)
-        max_tokens = model_config.get("max_tokens", int(thinking_budget * 1.5))
-        
+    if enable_native_thinking:
         additional_request_fields = {
             "max_tokens": max_tokens,
             "thinking": {
@@ -81,8 +224,8 @@ def initialize_agent(config, mcp_manager=None):
     # Try to create model with streaming parameter if supported
     try:
         model = BedrockModel(
-            model_id=model_config.get("model_id", "us.anthropic.claude-3-7-sonnet-20250219-v1:0"),
-            region=model_config.get("region", "us-east-1"),
+            model_id=model_id,
+            region=region,
             additional_request_fields=additional_request_fields,
             streaming=enable_streaming  # Try to pass streaming parameter
         )
@@ -90,49 +233,88 @@ def initialize_agent(config, mcp_manager=None):
         # If streaming parameter is not supported, fall back to default
         logger.warning("BedrockModel does not support streaming parameter, using default behavior")
         model = BedrockModel(
-            model_id=model_config.get("model_id", "us.anthropic.claude-3-7-sonnet-20250219-v1:0"),
-            region=model_config.get("region", "us-east-1"),
+            model_id=model_id,
+            region=region,
             additional_request_fields=additional_request_fields
         )
     
-    # Import pre-built tools directly
-    from strands_tools import (
-        calculator,
-        editor,
-        environment,
-        file_read,
-        file_write,
-        http_request,
-        python_repl,
-        shell,
-        think,
-        workflow  # Add workflow tool here
-    )
+    # Warm the connection in the background so the first prompt doesn't pay for it
+    threading.Thread(target=_warm_model, args=(model, model_id), daemon=True).start()
+    return model
+
+def _warm_model(model, model_id):
+    """
+    Send a one-token request so the TLS connection and request signer are ready.
+    
+    Args:
+        model: BedrockModel whose client should be warmed
+        model_id: Bedrock model identifier
+    """
+    client = getattr(model, "client", None)
+    if client is None:
+        return
     
-    # Create a list of tools based on configuration
-    tools_config = config.get("tools", {})
-    enabled_tool_names = tools_config.get("enabled", [])
-    
-    # Map tool names to actual tool objects
-    tool_map = {
-        "calculator": calculator,
-        "editor": editor,
-        "environment": environment,
-        "file_read": file_read,
-        "file_write": file_write,
-        "http_request": http_request,
-        "python_repl": python_repl,
-        "shell": shell,
-        "think": think,
-        "workflow": workflow  # Add workflow to the map
-    }
+    try:
+        client.converse(
+            modelId=model_id,
+            messages=[{"role": "user", "content": [{"text": "hi"}]}],
+            inferenceConfig={"maxTokens": 1}
+        )
+        logger.info(f"Warmed up model: {model_id}")
+    except Exception as e:
+        # Warmup is best effort; the real request will surface any problem
+        logger.debug(f"Model warmup failed for {model_id}: {str(e)}")
+
+@st.cache_resource(show_spinner=False)
+def _load_sdk_tools(enabled_tool_names):
+    """
+    Resolve the enabled Strands SDK tools, reusing the list for identical selections.
     
+    Args:
+        enabled_tool_names: Tuple of enabled tool names
+        
+    Returns:
+        list: Tool objects for the enabled names
+    """
     # Select tools based on configuration
-    tools = []  # Start with empty tools list
-    for tool_name in enabled_tool_names:
-        if tool_name in tool_map:
-            tools.append(tool_map[tool_name])
-            logger.info(f"Added tool: {tool_name}")
+    selected_names = [tool_name for tool_name in enabled_tool_names if tool_name in _TOOL_MAP]
+    logger.info(f"Added tools: {', '.join(selected_names)}")
+    return [_TOOL_MAP[tool_name] for tool_name in selected_names]
+
+def initialize_agent(config, mcp_manager=None):
+    """
+    Initialize the Strands agent with the given configuration.
+    
+    The model and SDK tools come from cached factories, so only the Agent
+    itself (which owns the conversation) is created per call.
+    
+    Args:
+        config: Agent configuration
+        mcp_manager: MCP server manager for additional tools
+        
+    Returns:
+        Agent: Initialized Strands agent
+    """
+    # Create model based on config
+    model_config = config.get("model", {})
+    agent_config = config.get("agent", {})
+    
+    # Get thinking budget from config or use default
+    thinking_budget = agent_config.get("thinking_budget", 16000)
+    
+    model = _build_model(
+        model_config.get("model_id", "us.anthropic.claude-3-7-sonnet-20250219-v1:0"),
+        model_config.get("region", "us-east-1"),
+        model_config.get("enable_streaming", True),
+        agent_config.get("enable_native_thinking", False),
+        thinking_budget,
+        # Get max_tokens from model config or use default (1.5x thinking budget)
+        model_config.get("max_tokens", int(thinking_budget * 1.5))
+    )
+    
+    # Create a list of tools based on configuration (copied, since MCP tools are appended)
+    enabled_tool_names = tuple(config.get("tools", {}).get("enabled", []))
+    tools = list(_load_sdk_tools(enabled_tool_names))
     
     # Get tools from MCP servers if available
     if mcp_manager:
@@ -167,6 +349,87 @@ def initialize_agent(config, mcp_manager=None):
         callback_handler=None  # Will be set per interaction
     )
 
+def refresh_mcp_tools(agent, mcp_manager):
+    """
+    Replace the agent's MCP tools in place after a server connect/disconnect.
+    
+    The model, SDK tools and conversation history are left untouched, so no
+    new Agent has to be built when only the MCP tool set changed.
+    
+    Args:
+        agent: Strands agent to update
+        mcp_manager: MCP server manager providing the current tools
+    """
+    registry = agent.tool_registry
+    stale_names = [name for name, agent_tool in registry.registry.items() if isinstance(agent_tool, MCPAgentTool)]
+    for name in stale_names:
+        registry.registry.pop(name, None)
+        registry.dynamic_tools.pop(name, None)
+    
+    registry.process_tools(mcp_manager.get_all_tools())
+    logger.info(f"Swapped MCP tools: removed {len(stale_names)}, now {len(registry.registry)} tools registered")
+
+async def _transcribe_attached_audio(audio_bytes, file_extension, language_options, region,
+                                     placeholder=None):
+    """
+    Transcribe attached audio, showing confirmed text as it arrives.
+    
+    The uploaded bytes are streamed to Transcribe from memory; nothing is
+    written to disk. Confirmed transcript text is shown in the placeholder
+    as it arrives.
+    
+    Args:
+        audio_bytes: Audio file contents
+        file_extension: Audio file extension, used if the format is not recognized
+        language_options: Language codes for automatic detection
+        region: AWS region for Transcribe
+        placeholder: Optional Streamlit placeholder for live transcript progress
+        
+    Returns:
+        dict: Transcription result
+    """
+    confirmed = []
+    
+    def on_confirmed(text):
+        confirmed.append(text)
+        if placeholder is not None:
+            placeholder.markdown(f"🎤 **Step 1/2:** Transcribing audio...\n\n> {' '.join(confirmed)}")
+    
+    return await transcribe_audio_bytes_async(audio_bytes, file_extension, language_options, region, on_confirmed)
+
+def _join_text_blocks(content):
+    """Concatenate the text of every text block in a message content list."""
+    return ''.join([block['text'] for block in content
+                    if isinstance(block, dict) and 'text' in block])
+
+def _from_agent_result(response):
+    """Extract text from an AgentResult object."""
+    message = response.message
+    if isinstance(message, dict) and isinstance(message.get('content'), list):
+        return _join_text_blocks(message['content'])
+    return None
+
+def _from_dict(response):
+    """Extract text from a dictionary-format response."""
+    if 'message' in response:
+        message = response['message']
+        if isinstance(message, dict) and 'content' in message:
+            content = message['content']
+            if isinstance(content, list) and len(content) > 0:
+                if isinstance(content[0], dict) and 'text' in content[0]:
+                    return content[0]['text']
+    elif 'final_message' in response:
+        final_message = response['final_message']
+        if isinstance(final_message, dict) and 'content' in final_message:
+            return _join_text_blocks(final_message['content'])
+    return None
+
+# Response type -> extractor, looked up by exact type before any duck typing
+_EXTRACTORS = {
+    AgentResult: _from_agent_result,
+    dict: _from_dict,
+}
+
 def extract_response_text(response):
     """
     Extract text from the agent's response object.
@@ -177,30 +440,14 @@ def extract_response_text(response):
     Returns:
         str: Extracted text from the response
     """
-    # If it's an AgentResult object
-    if hasattr(response, 'message'):
-        message = response.message
-        if isinstance(message, dict) and 'content' in message:
-            content = message['content']
-            if isinstance(content, list):
-                return ''.join(block.get('text', '') for block in content 
-                              if isinstance(block, dict) and 'text' in block)
-    
-    # Handle dictionary format
-    if isinstance(response, dict):
-        if 'message' in response:
-            message = response['message']
-            if isinstance(message, dict) and 'content' in message:
-                content = message['content']
-                if isinstance(content, list) and len(content) > 0:
-                    if isinstance(content[0], dict) and 'text' in content[0]:
-                        return content[0]['text']
-        elif 'final_message' in response:
-            final_message = response['final_message']
-            if isinstance(final_message, dict) and 'content' in final_message:
-                content_blocks = final_message['content']
-                return ''.join(block.get('text', '') for block in content_blocks 
-                              if isinstance(block, dict) and 'text' in block)
+    extractor = _EXTRACTORS.get(type(response))
+    if extractor is None and hasattr(response, 'message'):
+        extractor = _from_agent_result
+    
+    if extractor is not None:
+        text = extractor(response)
+        if text is not None:
+            return text
     
     # If we have a get_message_as_string method, use it
     if hasattr(response, 'get_message_as_string'):
@@ -209,266 +456,183 @@ def extract_response_text(response):
     # Fallback
     return str(response)
 
-def main():
-    """Main application entry point."""
-    st.set_page_config(
-        page_title="Strands Agent Chat with MCP Integration",
-        page_icon="🤖",
-        layout="wide"
+# st.fragment keeps widget reruns local to the fragment (Streamlit >= 1.37)
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+@_fragment
+def _render_sidebar():
+    """Render the configuration sidebar; widget changes rerun only this fragment."""
+    config = st.session_state.config
+    
+    st.header("Agent Configuration")
+    
+    system_prompt = st.text_area(
+        "System Prompt",
+        value=config["agent"]["system_prompt"],
+        height=100
     )
     
-    # Add custom CSS for better UI
-    st.markdown("""
-    <style>
-    .media-upload-btn {
-        background-color: #f0f2f6;
-        border: 2px dashed #cccccc;
-        border-radius: 8px;
-        padding: 8px;
-        text-align: center;
-        cursor: pointer;
-        transition: all 0.3s ease;
-    }
-    .media-upload-btn:hover {
-        border-color: #4CAF50;
-        background-color: #f8fff8;
-    }
-    .attachment-info {
-        background-color: #e8f4fd;
-        border-left: 4px solid #2196F3;
-        padding: 10px;
-        margin: 10px 0;
-        border-radius: 4px;
-    }
-    .transcription-result {
-        background-color: #f0f8ff;
-        border: 1px solid #b3d9ff;
-        border-radius: 8px;
-        padding: 15px;
-        margin: 10px 0;
-    }
-    .step-indicator {
-        color: #666;
-        font-weight: bold;
-        margin-bottom: 10px;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    # Add region selection
+    region = st.selectbox(
+        "AWS Region",
+        options=_REGION_OPTIONS,
+        index=0
+    )
     
-    # Load configuration
-    initial_config = load_config()
+    # Add model selection
+    model_id = st.selectbox(
+        "Model",
+        options=_MODEL_OPTIONS,
+        index=0
+    )
     
-    # Initialize MCP server manager
-    if "mcp_manager" not in st.session_state:
-        st.session_state.mcp_manager = MCPServerManager()
-        # Load MCP server configurations
-        st.session_state.mcp_manager.load_config("config/mcp_config.json")
+    # Add native thinking toggle
+    enable_native_thinking = st.checkbox(
+        "Enable Native Thinking",
+        value=config["agent"].get("enable_native_thinking", True)
+    )
     
-    # Initialize session state variables
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
+    # Add streaming toggle
+    enable_streaming = st.checkbox(
+        "Enable Streaming Responses",
+        value=config["model"].get("enable_streaming", True),
+        help="Enable real-time streaming of responses"
+    )
     
-    if "config" not in st.session_state:
-        st.session_state.config = initial_config
+    # Add conversation window size slider
+    window_size = st.slider(
+        "Conversation Window Size",
+        min_value=5,
+        max_value=50,
+        value=config["conversation"].get("window_size", 20),
+        step=1,
+        help="Maximum number of messages to keep in conversation history"
+    )
     
-    if "agent" not in st.session_state:
-        st.session_state.agent = initialize_agent(st.session_state.config, st.session_state.mcp_manager)
-        
-    if "processing" not in st.session_state:
-        st.session_state.processing = False
-        
-    if "thinking_history" not in st.session_state:
-        st.session_state.thinking_history = []
+    # Tool configuration section
+    st.header("Tool Configuration")
     
-    # Use session state config for UI controls
-    config = st.session_state.config
+    # Get all available tool names
+    available_tool_names = list(_tool_names_cached())
     
-    st.title("🤖 Strands Agent Chat with MCP Integration")
-    st.markdown("""
-    This demo showcases a Strands agent with streaming responses, tool execution, and MCP server integration.
-    You can connect to MCP servers to extend the agent's capabilities with additional tools.
-    """)
+    # Get currently enabled tools
+    enabled_tools = config.get("tools", {}).get("enabled", [])
     
-    # Sidebar for configuration
-    with st.sidebar:
-        st.header("Agent Configuration")
-        
-        system_prompt = st.text_area(
-            "System Prompt",
-            value=config["agent"]["system_prompt"],
-            height=100
-        )
-        
-        # Add region selection
-        region = st.selectbox(
-            "AWS Region",
-            options=["us-east-1", "us-west-2", "eu-central-1", "ap-southeast-1"],
-            index=0
-        )
-        
-        # Add model selection
-        model_id = st.selectbox(
-            "Model",
-            options=[
-                "us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-                "us.anthropic.claude-3-5-sonnet-20241022-v2:0",
-                "anthropic.claude-3-haiku-20240307-v1:0",
-                "us.anthropic.claude-3-5-haiku-20241022-v1:0",
-                "us.amazon.nova-premier-v1:0",
-                "us.amazon.nova-lite-v1:0",
-                "us.amazon.nova-pro-v1:0",
-                "us.meta.llama4-maverick-17b-instruct-v1:0",
-                "us.meta.llama4-scout-17b-instruct-v1:0"
-            ],
-            index=0
-        )
-        
-        # Add native thinking toggle
-        enable_native_thinking = st.checkbox(
-            "Enable Native Thinking",
-            value=config["agent"].get("enable_native_thinking", True)
-        )
-        
-        # Add streaming toggle
-        enable_streaming = st.checkbox(
-            "Enable Streaming Responses",
-            value=config["model"].get("enable_streaming", True),
-            help="Enable real-time streaming of responses"
-        )
-        
-        # Add conversation window size slider
-        window_size = st.slider(
-            "Conversation Window Size",
-            min_value=5,
-            max_value=50,
-            value=config["conversation"].get("window_size", 20),
-            step=1,
-            help="Maximum number of messages to keep in conversation history"
-        )
-        
-        # Tool configuration section
-        st.header("Tool Configuration")
-        
-        # Get all available tool names
-        available_tool_names = get_available_tool_names()
-        
-        # Get currently enabled tools
-        enabled_tools = config.get("tools", {}).get("enabled", [])
-        
-        # Filter enabled tools to only include available ones
-        valid_enabled_tools = [tool for tool in enabled_tools if tool in available_tool_names]
+    # Filter enabled tools to only include available ones
+    valid_enabled_tools = [tool for tool in enabled_tools if tool in available_tool_names]
+    
+    # Create multiselect for tool selection
+    selected_tools = st.multiselect(
+        "Enabled Tools",
+        options=available_tool_names,
+        default=valid_enabled_tools,  # Use only valid tools as default
+        help="Select the tools you want to enable"
+    )
+    
+    if st.button("Apply Configuration"):
+        # Update config
+        config["model"]["region"] = region
+        config["model"]["model_id"] = model_id
+        config["model"]["enable_streaming"] = enable_streaming
+        config["agent"]["system_prompt"] = system_prompt
+        config["agent"]["enable_native_thinking"] = enable_native_thinking
+        config["conversation"]["window_size"] = window_size
         
-        # Create multiselect for tool selection
-        selected_tools = st.multiselect(
-            "Enabled Tools",
-            options=available_tool_names,
-            default=valid_enabled_tools,  # Use only valid tools as default
-            help="Select the tools you want to enable"
-        )
+        # Update tools configuration
+        if "tools" not in config:
+            config["tools"] = {}
+        config["tools"]["enabled"] = selected_tools
         
-        if st.button("Apply Configuration"):
-            # Update config
-            config["model"]["region"] = region
-            config["model"]["model_id"] = model_id
-            config["model"]["enable_streaming"] = enable_streaming
-            config["agent"]["system_prompt"] = system_prompt
-            config["agent"]["enable_native_thinking"] = enable_native_thinking
-            config["conversation"]["window_size"] = window_size
-            
-            # Update tools configuration
-            if "tools" not in config:
-                config["tools"] = {}
-            config["tools"]["enabled"] = selected_tools
-            
-            # Update session state
-            st.session_state.config = config
+        # Update session state
+        st.session_state.config = config
+        with st.session_state.agent_lock:
             st.session_state.agent = initialize_agent(config, st.session_state.mcp_manager)
-            st.success("Configuration applied!")
-        
-        st.divider()
-        
-        # MCP Server Configuration
-        st.header("MCP Server Configuration")
-        
-        # Display configured servers
-        mcp_manager = st.session_state.mcp_manager
-        server_ids = mcp_manager.get_server_ids()
-        
-        if server_ids:
-            for server_id in server_ids:
-                status = mcp_manager.get_server_status(server_id)
-                
-                col1, col2 = st.columns([2, 1])
-                
-                with col1:
-                    if status.get('connected', False):
-                        st.write(f"✅ {server_id}")
-                    else:
-                        st.write(f"⚪ {server_id}")
-                
-                with col2:
-                    if status.get('connected', False):
-                        if st.button(f"Disconnect", key=f"disconnect_{server_id}"):
-                            if mcp_manager.disconnect_server(server_id):
-                                st.success(f"Disconnected from {server_id}")
-                                # Reinitialize agent with updated tools
-                                st.session_state.agent = initialize_agent(
-                                    st.session_state.config, 
-                                    mcp_manager
-                                )
-                            else:
-                                st.error(f"Failed to disconnect from {server_id}")
-                    else:
-                        if st.button(f"Connect", key=f"connect_{server_id}"):
-                            if mcp_manager.connect_server(server_id):
-                                st.success(f"Connected to {server_id}")
-                                # Reinitialize agent with new tools
-                                st.session_state.agent = initialize_agent(
-                                    st.session_state.config, 
-                                    mcp_manager
-                                )
-                            else:
-                                st.error(f"Failed to connect to {server_id}")
-                
-                # Display server details
-                with st.expander(f"Server details: {server_id}"):
-                    st.write(f"Command: {status.get('command', 'N/A')}")
-                    st.write(f"Args: {', '.join(status.get('args', []))}")
-                    st.write(f"Status: {'Connected' if status.get('connected', False) else 'Disconnected'}")
-        else:
-            st.info("No MCP servers configured. Edit the mcp_config.json file to add servers.")
-        
-        # Reload configuration button
-        if st.button("Reload MCP Configuration"):
-            if mcp_manager.load_config("config/mcp_config.json"):
-                st.success("MCP configuration reloaded")
-            else:
-                st.error("Failed to reload MCP configuration")
-        
-        # Display active tools
-        st.header("Active Tools")
-        
-        # Get SDK tools from config
-        sdk_tools = config.get("tools", {}).get("enabled", [])
-        if sdk_tools:
-            st.subheader("SDK Tools")
-            for tool_name in sdk_tools:
-                st.write(f"- {tool_name}")
-        
-        # Get MCP tools
-        mcp_tools = []
+        st.success("Configuration applied!")
+    
+    st.divider()
+    
+    # MCP Server Configuration
+    st.header("MCP Server Configuration")
+    
+    # Display configured servers
+    mcp_manager = st.session_state.mcp_manager
+    server_ids = mcp_manager.get_server_ids()
+    
+    if server_ids:
         for server_id in server_ids:
             status = mcp_manager.get_server_status(server_id)
-            if status.get('connected', False):
-                server_tools = mcp_manager.get_tools(server_id)
-                if server_tools:
-                    if not mcp_tools:  # Only add header if we have tools
-                        st.subheader("MCP Tools")
-                    for tool in server_tools:
-                        tool_name = getattr(tool, "__name__", str(tool))
-                        st.write(f"- {tool_name} ({server_id})")
-    
-    # Display conversation history with thinking processes
+            
+            col1, col2 = st.columns([2, 1])
+            
+            with col1:
+                if status.get('connected', False):
+                    st.write(f"✅ {server_id}")
+                else:
+                    st.write(f"⚪ {server_id}")
+            
+            with col2:
+                if status.get('connected', False):
+                    if st.button(f"Disconnect", key=f"disconnect_{server_id}"):
+                        if mcp_manager.disconnect_server(server_id):
+                            st.success(f"Disconnected from {server_id}")
+                            # Swap in the updated MCP tools, keeping the model and conversation
+                            with st.session_state.agent_lock:
+                                refresh_mcp_tools(st.session_state.agent, mcp_manager)
+                        else:
+                            st.error(f"Failed to disconnect from {server_id}")
+                else:
+                    if st.button(f"Connect", key=f"connect_{server_id}"):
+                        if mcp_manager.connect_server(server_id):
+                            st.success(f"Connected to {server_id}")
+                            # Swap in the new MCP tools, keeping the model and conversation
+                            with st.session_state.agent_lock:
+                                refresh_mcp_tools(st.session_state.agent, mcp_manager)
+                        else:
+                            st.error(f"Failed to connect to {server_id}")
+            
+            # Display server details
+            with st.expander(f"Server details: {server_id}"):
+                st.write(f"Command: {status.get('command', 'N/A')}")
+                st.write(f"Args: {', '.join(status.get('args', []))}")
+                st.write(f"Status: {'Connected' if status.get('connected', False) else 'Disconnected'}")
+    else:
+        st.info("No MCP servers configured. Edit the mcp_config.json file to add servers.")
+    
+    # Reload configuration button
+    if st.button("Reload MCP Configuration"):
+        if mcp_manager.load_config("config/mcp_config.json"):
+            _load_config_cached.clear()
+            _tool_names_cached.clear()
+            clear_tool_cache()
+            st.success("MCP configuration reloaded")
+        else:
+            st.error("Failed to reload MCP configuration")
+    
+    # Display active tools
+    st.header("Active Tools")
+    
+    # Get SDK tools from config
+    sdk_tools = config.get("tools", {}).get("enabled", [])
+    if sdk_tools:
+        st.subheader("SDK Tools")
+        for tool_name in sdk_tools:
+            st.write(f"- {tool_name}")
+    
+    # Get MCP tools
+    connected_ids = [server_id for server_id in server_ids
+                     if mcp_manager.get_server_status(server_id).get('connected', False)]
+    # Uncached servers are queried concurrently; cached ones cost no RPC
+    mcp_tools = mcp_manager.get_tools_by_server(connected_ids)
+    if any(mcp_tools.values()):  # Only add header if we have tools
+        st.subheader("MCP Tools")
+    for server_id, server_tools in mcp_tools.items():
+        for tool in server_tools:
+            tool_name = getattr(tool, "__name__", str(tool))
+            st.write(f"- {tool_name} ({server_id})")
+
+@_fragment
+def _render_history():
+    """Render the conversation history with thinking processes."""
     for i, message in enumerate(st.session_state.messages):
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
@@ -476,33 +640,18 @@ def main():
             # If this is an assistant message, check if there's thinking history for the previous question
             if message["role"] == "assistant" and i > 0:  # Make sure there's a previous message
                 # Find thinking content for the previous question (user message)
-                for thinking_item in st.session_state.thinking_history:
-                    if thinking_item["question_idx"] == i-1:  # i-1 is the index of the user message
-                        # Display the thinking content
-                        with st.expander("💭 Thinking Process", expanded=False):
-                            st.markdown(f"""
-                            <div style="background-color: rgba(67, 97, 238, 0.1); padding: 10px; border-left: 4px solid #4361ee; border-radius: 4px; color: var(--text-color, currentColor);">
-                            {thinking_item["content"]}
-                            </div>
-                            """, unsafe_allow_html=True)
-                        break
-    
-    # Initialize session state for media upload
-    if "uploaded_audio_file" not in st.session_state:
-        st.session_state.uploaded_audio_file = None
-    if "audio_file_name" not in st.session_state:
-        st.session_state.audio_file_name = None
-    if "show_media_upload" not in st.session_state:
-        st.session_state.show_media_upload = False
-    
+                thinking_item = st.session_state.thinking_by_qidx.get(i-1)  # i-1 is the index of the user message
+                if thinking_item is not None:
+                    # Display the thinking content
+                    with st.expander("💭 Thinking Process", expanded=False):
+                        st.markdown(_THINKING_TMPL.format(content=thinking_item["content"]), unsafe_allow_html=True)
+
+@_fragment
+def _render_media_upload():
+    """Render the audio attachment info and upload dialog."""
     # Show attached file info if exists
     if st.session_state.uploaded_audio_file is not None:
-        st.markdown(f"""
-        <div class="attachment-info">
-            📎 <strong>Attached:</strong> {st.session_state.audio_file_name}
-            <br><small>This audio file will be transcribed and included with your next message</small>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(_ATTACHMENT_TMPL.format(file_name=st.session_state.audio_file_name), unsafe_allow_html=True)
         
         col_remove, col_change = st.columns([1, 1])
         with col_remove:
@@ -518,7 +667,7 @@ def main():
     if not st.session_state.uploaded_audio_file or st.session_state.show_media_upload:
         # Media upload button
         if not st.session_state.show_media_upload:
-            if st.button("📎 Attach Audio File", help="Upload MP3 or WAV file for transcription", key="media_upload_btn"):
+            if st.button("📎 Attach Audio File", help="Upload an MP3, WAV, FLAC, OGG or M4A file for transcription", key="media_upload_btn"):
                 st.session_state.show_media_upload = True
                 st.rerun()
     
@@ -528,9 +677,9 @@ def main():
             st.markdown("### 📎 Attach Audio File")
             
             uploaded_file = st.file_uploader(
-                "Choose an MP3 or WAV file to transcribe",
-                type=['mp3', 'wav'],
-                help="Upload an MP3 or WAV audio file. It will be transcribed and combined with your text message.",
+                "Choose an audio file to transcribe",
+                type=['mp3', 'wav', 'flac', 'ogg', 'm4a'],
+                help="Upload an MP3, WAV, FLAC, OGG or M4A audio file. It will be transcribed and combined with your text message.",
                 key="audio_uploader"
             )
             
@@ -544,17 +693,17 @@ def main():
                 with col_lang:
                     language_options = st.multiselect(
                         "🌍 Language Detection",
-                        options=["en-US", "id-ID", "zh-CN", "ja-JP", "ko-KR", "th-TH"],
-                        default=["en-US", "id-ID"],
+                        options=_LANG_OPTIONS,
+                        default=_LANG_DEFAULT,
                         help="Select languages for automatic detection"
                     )
                 
                 with col_region:
                     aws_region = st.selectbox(
                         "🌐 AWS Region",
-                        options=["ap-southeast-1", "us-east-1", "us-west-2", "eu-central-1"],
+                        options=_TRANSCRIBE_REGION_OPTIONS,
                         index=0,
-                        help="AWS region for Transcribe service"
+                        help="AWS region for Transcribe service, or \"local\" for on-box faster-whisper"
                     )
                 
                 # Action buttons
@@ -566,8 +715,8 @@ def main():
                         st.session_state.audio_language_options = language_options
                         st.session_state.audio_aws_region = aws_region
                         st.session_state.show_media_upload = False
-                        st.success(f"📎 Attached: {uploaded_file.name}")
-                        time.sleep(1)  # Brief pause to show success message
+                        # Toast survives the rerun, so there is no need to pause for it
+                        st.toast(f"📎 Attached: {uploaded_file.name}", icon="✅")
                         st.rerun()
                 
                 with col_cancel:
@@ -579,6 +728,73 @@ def main():
                 if st.button("❌ Cancel", key="cancel_no_file"):
                     st.session_state.show_media_upload = False
                     st.rerun()
+
+def main():
+    """Main application entry point."""
+    st.set_page_config(
+        page_title="Strands Agent Chat with MCP Integration",
+        page_icon="🤖",
+        layout="wide"
+    )
+    
+    # Add custom CSS for better UI
+    st.markdown(_CSS, unsafe_allow_html=True)
+    
+    # Load configuration
+    initial_config = _load_config_cached()
+    
+    # Initialize MCP server manager
+    if "mcp_manager" not in st.session_state:
+        st.session_state.mcp_manager = MCPServerManager()
+        # Load MCP server configurations
+        st.session_state.mcp_manager.load_config("config/mcp_config.json")
+    
+    # Initialize session state variables
+    if "messages" not in st.session_state:
+        st.session_state.messages = []
+    
+    if "config" not in st.session_state:
+        st.session_state.config = initial_config
+    
+    if "agent_lock" not in st.session_state:
+        # Serializes agent rebuilds and invocations within this session
+        st.session_state.agent_lock = threading.Lock()
+    
+    if "agent" not in st.session_state:
+        st.session_state.agent = initialize_agent(st.session_state.config, st.session_state.mcp_manager)
+        
+    if "processing" not in st.session_state:
+        st.session_state.processing = False
+        
+    if "thinking_history" not in st.session_state:
+        st.session_state.thinking_history = []
+    
+    if "thinking_by_qidx" not in st.session_state:
+        # Index of thinking_history by question index for O(1) lookup when rendering
+        st.session_state.thinking_by_qidx = {}
+    
+    st.title("🤖 Strands Agent Chat with MCP Integration")
+    st.markdown("""
+    This demo showcases a Strands agent with streaming responses, tool execution, and MCP server integration.
+    You can connect to MCP servers to extend the agent's capabilities with additional tools.
+    """)
+    
+    # Sidebar for configuration
+    with st.sidebar:
+        _render_sidebar()
+    
+    # Display conversation history with thinking processes
+    _render_history()
+    
+    # Initialize session state for media upload
+    if "uploaded_audio_file" not in st.session_state:
+        st.session_state.uploaded_audio_file = None
+    if "audio_file_name" not in st.session_state:
+        st.session_state.audio_file_name = None
+    if "show_media_upload" not in st.session_state:
+        st.session_state.show_media_upload = False
+    
+    _render_media_upload()
     
     # Get user input
     user_input = st.chat_input("Ask something...", disabled=st.session_state.processing)
@@ -613,26 +829,18 @@ def main():
                     # Show transcription progress
                     response_placeholder.markdown("🎤 **Step 1/2:** Transcribing audio...")
                     
-                    # Save audio file temporarily
-                    # Determine file extension from the original filename
-                    file_extension = st.session_state.audio_file_name.lower().split('.')[-1]
-                    if file_extension not in ['mp3', 'wav']:
-                        file_extension = 'mp3'  # Default fallback
-                    
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_extension}") as tmp_file:
-                        tmp_file.write(st.session_state.uploaded_audio_file)
-                        tmp_file_path = tmp_file.name
+                    # The transcriber sniffs the format; the extension is only a fallback
+                    file_extension = os.path.splitext(st.session_state.audio_file_name)[1]
                     
                     try:
                         # Transcribe audio
-                        transcription_result = transcribe_audio_file_sync(
-                            file_path=tmp_file_path,
-                            language_options=st.session_state.get("audio_language_options", ["en-US", "id-ID"]),
-                            region=st.session_state.get("audio_aws_region", "ap-southeast-1")
-                        )
-                        
-                        # Clean up temporary file
-                        os.unlink(tmp_file_path)
+                        transcription_result = asyncio.run(_transcribe_attached_audio(
+                            st.session_state.uploaded_audio_file,
+                            file_extension,
+                            st.session_state.get("audio_language_options", list(_LANG_DEFAULT)),
+                            st.session_state.get("audio_aws_region", "ap-southeast-1"),
+                            response_placeholder
+                        ))
                         
                         if transcription_result["status"] == "success":
                             transcript = transcription_result["transcript"]
@@ -640,32 +848,21 @@ def main():
                             confidence = transcription_result.get("confidence")
                             
                             # Show transcription result with better formatting
-                            transcription_display = f"""
-<div class="transcription-result">
-<div class="step-indicator">🎤 Step 1/2: Audio Transcription Completed</div>
-
-<strong>📋 Transcription Results:</strong>
-<ul>
-<li><strong>Language Detected:</strong> {detected_language or 'Unknown'}</li>
-<li><strong>Confidence:</strong> {f'{confidence:.1%}' if confidence else 'N/A'}</li>
-<li><strong>File:</strong> {st.session_state.audio_file_name}</li>
-</ul>
-
-<strong>📝 Transcript:</strong>
-<div style="background-color: white; padding: 10px; border-radius: 4px; margin: 10px 0; border-left: 4px solid #4CAF50;">
-<em>"{transcript}"</em>
-</div>
-
-<div class="step-indicator">🤖 Step 2/2: Processing with AI Agent...</div>
-</div>
-"""
+                            transcription_display = _TRANSCRIPT_TMPL.format(
+                                detected_language=detected_language or 'Unknown',
+                                confidence=f'{confidence:.1%}' if confidence else 'N/A',
+                                file_name=st.session_state.audio_file_name,
+                                transcript=transcript
+                            )
                             response_placeholder.markdown(transcription_display, unsafe_allow_html=True)
                             
                             # Combine transcript with user input
-                            final_input = f"""User Request: {user_input}
-
-Audio Transcription (Language: {detected_language}):
-{transcript}"""
+                            final_input = "\n".join((
+                                f"User Request: {user_input}",
+                                "",
+                                f"Audio Transcription (Language: {detected_language}):",
+                                transcript
+                            ))
                             
                             # Clear audio attachment after use
                             st.session_state.uploaded_audio_file = None
@@ -673,31 +870,17 @@ Audio Transcription (Language: {detected_language}):
                             
                         else:
                             # Transcription failed, show error and continue with text only
-                            error_msg = f"""
-<div style="background-color: #fff3cd; border: 1px solid #ffeaa7; border-radius: 8px; padding: 15px; margin: 10px 0;">
-⚠️ <strong>Audio transcription failed:</strong> {transcription_result['message']}
-<br><br>
-<em>Continuing with text input only...</em>
-</div>
-"""
+                            error_msg = _TRANSCRIBE_FAILED_TMPL.format(message=transcription_result['message'])
                             response_placeholder.markdown(error_msg, unsafe_allow_html=True)
-                            time.sleep(3)  # Show error for 3 seconds
+                            # The placeholder is reused for the response, so keep the error visible as a toast
+                            st.toast(f"Audio transcription failed: {transcription_result['message']}", icon="⚠️")
                             
                     except Exception as e:
                         # Handle transcription errors
-                        error_msg = f"""
-<div style="background-color: #f8d7da; border: 1px solid #f5c6cb; border-radius: 8px; padding: 15px; margin: 10px 0;">
-❌ <strong>Audio processing error:</strong> {str(e)}
-<br><br>
-<em>Continuing with text input only...</em>
-</div>
-"""
+                        error_msg = _AUDIO_ERROR_TMPL.format(error=str(e))
                         response_placeholder.markdown(error_msg, unsafe_allow_html=True)
-                        time.sleep(3)  # Show error for 3 seconds
-                        
-                        # Clean up temporary file if it exists
-                        if 'tmp_file_path' in locals() and os.path.exists(tmp_file_path):
-                            os.unlink(tmp_file_path)
+                        # The placeholder is reused for the response, so keep the error visible as a toast
+                        st.toast(f"Audio processing error: {str(e)}", icon="❌")
                 
                 # Step 2: Process with agent
                 # Check streaming config
@@ -711,49 +894,52 @@ Audio Transcription (Language: {detected_language}):
                 print(f"Streaming enabled: {streaming_enabled}")
                 print("=" * 50)
                 
-                # Use the existing agent instance from session state
-                agent = st.session_state.agent
-                
-                if streaming_enabled:
-                    # Streaming mode (existing behavior)
-                    ui_config = st.session_state.config.get("ui", {})
-                    update_interval = ui_config.get("update_interval", 0.1)
+                # Use the existing agent instance from session state; hold the lock so a
+                # concurrent configuration change can't swap the agent mid-turn
+                with st.session_state.agent_lock:
+                    agent = st.session_state.agent
                     
-                    stream_handler = StreamlitHandler(
-                        placeholder=response_placeholder,
-                        update_interval=update_interval
-                    )
-                    
-                    agent.callback_handler = stream_handler
+                    if streaming_enabled:
+                        # Streaming mode (existing behavior)
+                        ui_config = st.session_state.config.get("ui", {})
+                        update_interval = ui_config.get("update_interval", 0.1)
+                        flush_chars = ui_config.get("flush_chars", 24)
+                        
+                        stream_handler = StreamlitHandler(
+                            placeholder=response_placeholder,
+                            update_interval=update_interval,
+                            flush_chars=flush_chars
+                        )
                     
-                    # Process with streaming
-                    response = agent(final_input)
-                    response_text = extract_response_text(response)
+                        # Process with streaming; the agent runs on a worker thread while
+                        # this script thread renders its events
+                        response = stream_handler.run_agent(agent, final_input)
+                        response_text = extract_response_text(response)
                     
-                    # Handle streaming response display
-                    if not stream_handler.message_container:
-                        response_placeholder.markdown(response_text)
-                    else:
-                        response_placeholder.markdown(stream_handler.message_container)
+                        # Handle streaming response display
+                        if not stream_handler.message_container:
+                            response_placeholder.markdown(response_text)
+                        else:
+                            stream_handler.flush()
                     
-                    # Make sure thinking content is preserved after the response
-                    if stream_handler.thinking_container and not stream_handler.thinking_preserved:
-                        stream_handler._preserve_thinking_content()
+                        # Make sure thinking content is preserved after the response
+                        if stream_handler.thinking_container and not stream_handler.thinking_preserved:
+                            stream_handler._preserve_thinking_content()
                     
-                    final_response_text = response_text or stream_handler.message_container
+                        final_response_text = response_text or stream_handler.message_container
                     
-                else:
-                    # Non-streaming mode
-                    with st.spinner("Processing your request..."):
-                        agent.callback_handler = NoOpHandler()  # Use no-op handler instead of None
+                    else:
+                        # Non-streaming mode
+                        with st.spinner("Processing your request..."):
+                            agent.callback_handler = NoOpHandler()  # Use no-op handler instead of None
                         
-                        # Process without streaming
-                        response = agent(final_input)
-                        response_text = extract_response_text(response)
+                            # Process without streaming
+                            response = agent(final_input)
+                            response_text = extract_response_text(response)
                         
-                        # Display complete response at once
-                        response_placeholder.markdown(response_text)
-                        final_response_text = response_text
+                            # Display complete response at once
+                            response_placeholder.markdown(response_text)
+                            final_response_text = response_text
                 
                 # Add assistant response to chat history
                 st.session_state.messages.append({"role": "assistant", "content": final_response_text})
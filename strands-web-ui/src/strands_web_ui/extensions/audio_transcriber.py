@@ -2,17 +2,24 @@
 Audio transcription utility for MP3 files using AWS Transcribe.
 
 This module provides functionality to:
-- Process MP3 files and convert them to the required format for AWS Transcribe
+- Process MP3, WAV, FLAC, OGG and M4A files and convert them to the required format for AWS Transcribe
 - Automatically detect language (Indonesian/English)
 - Handle both streaming and batch transcription
+- Optionally transcribe on-box with faster-whisper (int8) when region is "local"
+  or no AWS credentials are configured
 """
 
 import asyncio
 import io
 import logging
-import tempfile
+import mmap
 import os
-from typing import Optional, Dict, Any, List
+import shutil
+import threading
+import time
+import wave
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Callable, AsyncIterator, Union
 import boto3
 from botocore.exceptions import ClientError
 
@@ -24,6 +31,14 @@ except ImportError:
     PYDUB_AVAILABLE = False
     logging.warning("pydub not available. Audio conversion features will be limited.")
 
+try:
+    import numpy as np
+    import soundfile as sf
+    import soxr
+    NUMPY_AUDIO_AVAILABLE = True
+except ImportError:
+    NUMPY_AUDIO_AVAILABLE = False
+
 try:
     from amazon_transcribe.client import TranscribeStreamingClient
     from amazon_transcribe.handlers import TranscriptResultStreamHandler
@@ -33,8 +48,58 @@ except ImportError:
     TRANSCRIBE_STREAMING_AVAILABLE = False
     logging.warning("amazon-transcribe not available. Using batch transcription only.")
 
+try:
+    from faster_whisper import WhisperModel
+    FASTER_WHISPER_AVAILABLE = True
+except ImportError:
+    FASTER_WHISPER_AVAILABLE = False
+
+# Region value that selects the on-box faster-whisper backend
+LOCAL_REGION = "local"
+
+# Streaming audio format: 16kHz mono 16-bit PCM
+PCM_SAMPLE_RATE = 16000
+PCM_BYTES_PER_SECOND = PCM_SAMPLE_RATE * 2
+# 4096 samples (256 ms) per audio event; always a whole number of samples
+CHUNK_BYTES = 4096 * 2
+
+# A stream is abandoned once neither audio nor results have moved for this long
+STREAM_IDLE_TIMEOUT = 10.0
+STREAM_WATCHDOG_POLL = 2.0
+
+# ffmpeg is used directly to stream-decode compressed audio into raw PCM
+FFMPEG_PATH = shutil.which("ffmpeg")
+
+# Formats that are decoded through ffmpeg/pydub rather than the WAV path
+DECODED_FORMATS = ("mp3", "flac", "ogg", "m4a")
+
 logger = logging.getLogger(__name__)
 
+def _sniff_audio_format(header: bytes) -> Optional[str]:
+    """
+    Identify an audio container from its leading bytes.
+    
+    Args:
+        header: At least the first 12 bytes of the file
+        
+    Returns:
+        "mp3", "wav", "flac", "ogg" or "m4a", or None if unrecognized
+    """
+    if header[:3] == b'ID3':
+        return "mp3"
+    # MPEG audio frame sync; layer bits 00 are reserved for MP3 but used by ADTS AAC
+    if len(header) > 1 and header[0] == 0xFF and (header[1] & 0xE0) == 0xE0 and (header[1] & 0x06):
+        return "mp3"
+    if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+        return "wav"
+    if header[:4] == b'fLaC':
+        return "flac"
+    if header[:4] == b'OggS':
+        return "ogg"
+    if header[4:8] == b'ftyp':
+        return "m4a"
+    return None
+
 class TranscriptionResult:
     """Container for transcription results."""
     
@@ -45,81 +110,167 @@ class TranscriptionResult:
         self.segments = []
         self.is_complete = False
 
+def _common_prefix_length(a: List[str], b: List[str]) -> int:
+    """Return the number of leading tokens shared by two token lists."""
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+def _as_file(audio_data):
+    """
+    Return a readable file object over audio data.
+    
+    A memory-mapped file is already file-like and is rewound and returned as
+    is, since wrapping it in BytesIO would copy the whole mapping. BytesIO
+    shares the buffer of a bytes object, so in-memory uploads stay uncopied too.
+    """
+    if isinstance(audio_data, mmap.mmap):
+        audio_data.seek(0)
+        return audio_data
+    return io.BytesIO(audio_data)
+
+def _wav_frames(wav_data: bytes) -> bytes:
+    """Return the sample frames of a WAV file without its header, or the input if it can't be parsed."""
+    try:
+        with wave.open(_as_file(wav_data), 'rb') as wav_file:
+            return wav_file.readframes(wav_file.getnframes())
+    except (wave.Error, EOFError):
+        return wav_data
+
+# Language identification event attributes worth logging at DEBUG level
+_LANGUAGE_EVENT_ATTRS = ("language_code", "score")
+
 class StreamingTranscriptHandler(TranscriptResultStreamHandler):
-    """Custom handler for streaming transcription events."""
+    """
+    Custom handler for streaming transcription events.
     
-    def __init__(self, stream, result_container: TranscriptionResult):
+    Partial results are confirmed with the LocalAgreement-2 policy: a token is
+    emitted through on_confirmed once two consecutive partial hypotheses agree
+    on it, so callers see stable text before the segment is final.
+    """
+    
+    def __init__(self, stream, result_container: TranscriptionResult,
+                 on_confirmed: Optional[Callable[[str], None]] = None):
         super().__init__(stream)
         self.result_container = result_container
         self.last_partial_transcript = ""  # Track the last partial result
+        self.on_confirmed = on_confirmed
+        self._previous_tokens: List[str] = []  # Tokens of the previous partial hypothesis
+        self._confirmed_count = 0  # Tokens of the current segment already emitted
+        self._final_parts: List[str] = []  # Final segment texts, joined once in finalize_transcript
+        self.last_activity = time.monotonic()  # Last audio sent or event received, for the idle watchdog
+    
+    def _emit_confirmed(self, tokens: List[str]) -> None:
+        """Send newly confirmed tokens to the on_confirmed callback."""
+        if tokens and self.on_confirmed:
+            self.on_confirmed(" ".join(tokens))
+    
+    def _agree_partial(self, transcript_text: str) -> None:
+        """Confirm the prefix this partial hypothesis shares with the previous one."""
+        tokens = transcript_text.split()
+        agreed = _common_prefix_length(self._previous_tokens, tokens)
+        if agreed > self._confirmed_count:
+            self._emit_confirmed(tokens[self._confirmed_count:agreed])
+            self._confirmed_count = agreed
+        self._previous_tokens = tokens
+    
+    def _agree_final(self, transcript_text: str) -> None:
+        """Emit whatever the final result adds beyond the confirmed prefix."""
+        self._emit_confirmed(transcript_text.split()[self._confirmed_count:])
+        self._previous_tokens = []
+        self._confirmed_count = 0
         
     async def handle_transcript_event(self, transcript_event: TranscriptEvent):
         """Handle transcript events and update the result container."""
+        self.last_activity = time.monotonic()
         try:
+            # Resolve once per event; per-event detail is only formatted at DEBUG level
+            debug = logger.isEnabledFor(logging.DEBUG)
+            result_container = self.result_container
+            append_segment = result_container.segments.append
             results = transcript_event.transcript.results
-            logger.info(f"=== TRANSCRIPT EVENT DEBUG ===")
-            logger.info(f"Number of results: {len(results)}")
+            if debug:
+                logger.debug("=== TRANSCRIPT EVENT DEBUG ===")
+                logger.debug("Number of results: %d", len(results))
             
             for i, result in enumerate(results):
-                logger.info(f"Result {i}: is_partial={result.is_partial}")
-                logger.info(f"Result {i}: alternatives count={len(result.alternatives) if result.alternatives else 0}")
+                if debug:
+                    logger.debug("Result %d: is_partial=%s", i, result.is_partial)
+                    logger.debug("Result %d: alternatives count=%d", i, len(result.alternatives) if result.alternatives else 0)
                 
-                if result.alternatives:
-                    for j, alt in enumerate(result.alternatives):
-                        transcript_text = alt.transcript if hasattr(alt, 'transcript') else ""
-                        confidence = getattr(alt, 'confidence', None)
-                        logger.info(f"  Alternative {j}: transcript='{transcript_text}', confidence={confidence}")
-                        
-                        # For the first alternative, process it
-                        if j == 0:
-                            # Update language code if available
-                            if hasattr(result, 'language_code') and result.language_code:
-                                self.result_container.language_code = result.language_code
-                                logger.info(f"Language from result: {result.language_code}")
-                            
-                            # Handle both partial and final results
-                            if transcript_text and transcript_text.strip():
-                                if result.is_partial:
-                                    logger.info(f"PARTIAL: '{transcript_text}'")
-                                    # Store the latest partial result
-                                    self.last_partial_transcript = transcript_text
-                                else:
-                                    logger.info(f"FINAL: '{transcript_text}' - ADDING TO TRANSCRIPT")
-                                    self.result_container.transcript += transcript_text + " "
-                                    self.result_container.confidence = confidence
-                                    
-                                    # Store segment information
-                                    segment = {
-                                        'transcript': transcript_text,
-                                        'confidence': confidence,
-                                        'start_time': getattr(result, 'start_time', None),
-                                        'end_time': getattr(result, 'end_time', None)
-                                    }
-                                    self.result_container.segments.append(segment)
-                                    
-                                    # Clear partial transcript since we got a final one
-                                    self.last_partial_transcript = ""
-                else:
+                if not result.alternatives:
                     logger.warning(f"Result {i}: No alternatives found")
+                    continue
+                
+                # Only the first alternative is used; the rest are only logged
+                alt = result.alternatives[0]
+                try:
+                    transcript_text = alt.transcript
+                except AttributeError:
+                    transcript_text = ""
+                confidence = getattr(alt, 'confidence', None)
+                if debug:
+                    for j, other in enumerate(result.alternatives):
+                        logger.debug("  Alternative %d: transcript=%r, confidence=%s",
+                                     j, getattr(other, 'transcript', ""), getattr(other, 'confidence', None))
+                
+                # Update language code if available
+                if getattr(result, 'language_code', None):
+                    result_container.language_code = result.language_code
+                    if debug:
+                        logger.debug("Language from result: %s", result.language_code)
+                
+                # Handle both partial and final results
+                if transcript_text and transcript_text.strip():
+                    if result.is_partial:
+                        if debug:
+                            logger.debug("PARTIAL: %r", transcript_text)
+                        # Store the latest partial result
+                        self.last_partial_transcript = transcript_text
+                        self._agree_partial(transcript_text)
+                    else:
+                        if debug:
+                            logger.debug("FINAL: %r - ADDING TO TRANSCRIPT", transcript_text)
+                        self._final_parts.append(transcript_text)
+                        self._agree_final(transcript_text)
+                        result_container.confidence = confidence
+                        
+                        # Store segment information
+                        segment = {
+                            'transcript': transcript_text,
+                            'confidence': confidence,
+                            'start_time': getattr(result, 'start_time', None),
+                            'end_time': getattr(result, 'end_time', None)
+                        }
+                        append_segment(segment)
+                        
+                        # Clear partial transcript since we got a final one
+                        self.last_partial_transcript = ""
             
             # Check for language identification at transcript level
             if hasattr(transcript_event.transcript, 'language_identification'):
                 lang_id = transcript_event.transcript.language_identification
                 if hasattr(lang_id, 'language_code') and lang_id.language_code:
-                    self.result_container.language_code = lang_id.language_code
-                    logger.info(f"Language from transcript level: {lang_id.language_code}")
+                    result_container.language_code = lang_id.language_code
+                    if debug:
+                        logger.debug("Language from transcript level: %s", lang_id.language_code)
             
-            logger.info(f"Current transcript state: '{self.result_container.transcript}'")
-            logger.info(f"Last partial transcript: '{self.last_partial_transcript}'")
-            logger.info(f"=== END TRANSCRIPT EVENT DEBUG ===")
+            if debug:
+                logger.debug("Current transcript state: %r", " ".join(self._final_parts))
+                logger.debug("Last partial transcript: %r", self.last_partial_transcript)
+                logger.debug("=== END TRANSCRIPT EVENT DEBUG ===")
                     
         except Exception as e:
-            logger.error(f"Error handling transcript event: {str(e)}")
-            import traceback
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.exception("Error handling transcript event: %s", e)
             
     def finalize_transcript(self):
         """Finalize transcript by using the last partial result if no final result was received."""
+        if self._final_parts:
+            self.result_container.transcript = " ".join(self._final_parts)
+        
         if not self.result_container.transcript.strip() and self.last_partial_transcript.strip():
             logger.info(f"No final transcript received, using last partial result: '{self.last_partial_transcript}'")
             self.result_container.transcript = self.last_partial_transcript
@@ -136,20 +287,14 @@ class StreamingTranscriptHandler(TranscriptResultStreamHandler):
     async def handle_language_identification_event(self, language_identification_event):
         """Handle language identification events."""
         try:
-            logger.info(f"=== LANGUAGE IDENTIFICATION EVENT ===")
-            logger.info(f"Event: {language_identification_event}")
-            
             if hasattr(language_identification_event, 'language_code'):
                 self.result_container.language_code = language_identification_event.language_code
-                logger.info(f"Language identification: {language_identification_event.language_code}")
+                logger.info("Language identification: %s", language_identification_event.language_code)
             
-            # Check for other language identification attributes
-            for attr in dir(language_identification_event):
-                if not attr.startswith('_'):
-                    value = getattr(language_identification_event, attr)
-                    logger.info(f"  {attr}: {value}")
-                    
-            logger.info(f"=== END LANGUAGE IDENTIFICATION EVENT ===")
+            if logger.isEnabledFor(logging.DEBUG):
+                # Only the documented attributes, instead of walking dir() on every event
+                for attr in _LANGUAGE_EVENT_ATTRS:
+                    logger.debug("  %s: %s", attr, getattr(language_identification_event, attr, None))
         except Exception as e:
             logger.error(f"Error handling language identification event: {str(e)}")
             
@@ -160,11 +305,23 @@ class StreamingTranscriptHandler(TranscriptResultStreamHandler):
             await super().handle_events()
             logger.info("Event handling completed")
         except Exception as e:
-            logger.error(f"Error in event handling: {str(e)}")
-            import traceback
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.exception("Error in event handling: %s", e)
             raise
 
+# (transcribe client, streaming client) per region; both are thread-safe to share
+_CLIENTS: Dict[str, tuple] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+def _get_clients(region: str) -> tuple:
+    """Return the boto3 Transcribe client and streaming client for a region, creating them once."""
+    with _CLIENTS_LOCK:
+        if region not in _CLIENTS:
+            _CLIENTS[region] = (
+                boto3.client('transcribe', region_name=region),
+                TranscribeStreamingClient(region=region) if TRANSCRIBE_STREAMING_AVAILABLE else None
+            )
+        return _CLIENTS[region]
+
 class AudioTranscriber:
     """Main class for handling audio transcription."""
     
@@ -176,30 +333,28 @@ class AudioTranscriber:
             region: AWS region for Transcribe service
         """
         self.region = region
-        self.transcribe_client = boto3.client('transcribe', region_name=region)
+        # Reuse clients across instances; building them resolves credentials and endpoints
+        self.transcribe_client, self.streaming_client = _get_clients(region)
         
         # Check if streaming client is available
-        if TRANSCRIBE_STREAMING_AVAILABLE:
-            self.streaming_client = TranscribeStreamingClient(region=region)
-        else:
-            self.streaming_client = None
+        if self.streaming_client is None:
             logger.warning("Streaming transcription not available. Using batch mode only.")
     
-    def _convert_mp3_to_wav(self, mp3_data: bytes) -> bytes:
+    def _convert_to_pcm(self, audio_data: bytes) -> bytes:
         """
-        Convert MP3 data to WAV format suitable for transcription.
+        Convert compressed audio data (MP3, FLAC, OGG, M4A) to raw PCM suitable for transcription.
         
         Args:
-            mp3_data: MP3 file data as bytes
+            audio_data: Audio file data as bytes
             
         Returns:
-            WAV file data as bytes
+            Raw PCM data as bytes (16kHz, mono, 16-bit, no WAV header)
         """
         if not PYDUB_AVAILABLE:
             raise RuntimeError("pydub is required for audio conversion. Please install it with: pip install pydub")
         
-        # Load MP3 from bytes
-        audio = AudioSegment.from_mp3(io.BytesIO(mp3_data))
+        # Load from bytes; without a format hint ffmpeg probes the container itself
+        audio = AudioSegment.from_file(_as_file(audio_data))
         
         # Convert to the format required by Transcribe
         # 16kHz, mono, 16-bit PCM
@@ -207,21 +362,70 @@ class AudioTranscriber:
         audio = audio.set_channels(1)
         audio = audio.set_sample_width(2)  # 16-bit
         
-        # Export to WAV format
-        wav_buffer = io.BytesIO()
-        audio.export(wav_buffer, format="wav")
-        wav_buffer.seek(0)
+        # The stream uses media_encoding="pcm", which expects headerless samples
+        return audio.raw_data
+    
+    async def _decode_to_pcm_stream(self, audio_data: bytes, chunk_size: int = CHUNK_BYTES) -> AsyncIterator[bytes]:
+        """
+        Decode compressed audio to raw PCM with ffmpeg, yielding chunks as they are produced.
+        
+        Args:
+            audio_data: Audio file data as bytes (any format ffmpeg can decode)
+            chunk_size: Maximum number of bytes per yielded chunk
+            
+        Yields:
+            Raw PCM chunks (16kHz, mono, 16-bit little-endian)
+        """
+        process = await asyncio.create_subprocess_exec(
+            FFMPEG_PATH, "-loglevel", "error", "-i", "pipe:0",
+            "-f", "s16le", "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1", "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
         
-        return wav_buffer.read()
+        async def feed_input():
+            try:
+                # transport.write() takes bytes, bytearray or memoryview, not mmap
+                process.stdin.write(memoryview(audio_data))
+                await process.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # ffmpeg exited early; its exit code reports why
+            finally:
+                process.stdin.close()
+        
+        # Feed stdin concurrently so decoding overlaps with sending
+        feeder = asyncio.create_task(feed_input())
+        try:
+            while True:
+                chunk = await process.stdout.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+            
+            await feeder
+            return_code = await process.wait()
+            if return_code != 0:
+                raise RuntimeError(f"ffmpeg failed to decode audio (exit code {return_code})")
+        finally:
+            feeder.cancel()
+            if process.returncode is None:
+                process.kill()
+                # Drain stdout too; wait() alone can block on the unread pipe
+                await process.communicate()
     
-    async def transcribe_streaming(self, audio_data: bytes, 
-                                 language_options: List[str] = None) -> TranscriptionResult:
+    async def transcribe_streaming(self, audio_data: Union[bytes, AsyncIterator[bytes]], 
+                                 language_options: List[str] = None,
+                                 on_confirmed: Optional[Callable[[str], None]] = None,
+                                 realtime: bool = False) -> TranscriptionResult:
         """
         Transcribe audio using streaming API.
         
         Args:
-            audio_data: Audio data in bytes (WAV format, 16kHz, mono)
+            audio_data: Raw 16kHz mono audio, either bytes-like or an async iterator of chunks
             language_options: List of language codes to consider
+            on_confirmed: Optional callback receiving transcript text as soon as it is confirmed
+            realtime: Pace sending to the audio duration instead of sending as fast as possible
             
         Returns:
             TranscriptionResult object
@@ -234,62 +438,112 @@ class AudioTranscriber:
         
         result_container = TranscriptionResult()
         logger.info(f"Starting transcription with language options: {language_options}")
-        logger.info(f"Audio data size: {len(audio_data)} bytes")
+        is_chunk_stream = hasattr(audio_data, '__aiter__')
+        if not is_chunk_stream:
+            logger.info(f"Audio data size: {len(audio_data)} bytes")
         
-        try:
-            # Start transcription stream
-            stream = await self.streaming_client.start_stream_transcription(
+        if len(language_options) == 1:
+            # A single known language skips language identification entirely
+            language_kwargs = dict(language_code=language_options[0])
+        else:
+            language_kwargs = dict(
                 language_code=None,  # Auto-detect
                 identify_language=True,
                 language_options=language_options,
+                identify_multiple_languages=False,  # Set to True if you want to detect multiple languages
+            )
+        
+        try:
+            # Start transcription stream
+            stream = await self.streaming_client.start_stream_transcription(
                 media_sample_rate_hz=16000,
                 media_encoding="pcm",
-                identify_multiple_languages=False,  # Set to True if you want to detect multiple languages
+                **language_kwargs
             )
             
             logger.info("Transcription stream started successfully")
             
             # Create handler
-            handler = StreamingTranscriptHandler(stream.output_stream, result_container)
+            handler = StreamingTranscriptHandler(stream.output_stream, result_container, on_confirmed)
             
             # Send audio data
             async def send_audio():
+                loop = asyncio.get_running_loop()
+                start_time = loop.time()
+                bytes_sent = 0
+                
+                async def send_chunk(chunk):
+                    nonlocal bytes_sent
+                    await stream.input_stream.send_audio_event(audio_chunk=chunk)
+                    handler.last_activity = time.monotonic()
+                    bytes_sent += len(chunk)
+                    if realtime:
+                        # Sleep against a monotonic schedule so send jitter doesn't accumulate
+                        delay = start_time + bytes_sent / PCM_BYTES_PER_SECOND - loop.time()
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                
                 try:
-                    # Use smaller chunks for better streaming performance
-                    chunk_size = 1024 * 4  # 4KB chunks (reduced from 8KB)
-                    total_chunks = (len(audio_data) + chunk_size - 1) // chunk_size
-                    logger.info(f"Sending {total_chunks} audio chunks of {chunk_size} bytes each")
-                    
-                    for i in range(0, len(audio_data), chunk_size):
-                        chunk = audio_data[i:i + chunk_size]
-                        await stream.input_stream.send_audio_event(audio_chunk=chunk)
-                        # Slightly longer delay for better processing
-                        await asyncio.sleep(0.05)  # 50ms delay
+                    if is_chunk_stream:
+                        # Forward chunks as the decoder produces them, holding back a
+                        # trailing odd byte so no event splits a 16-bit sample
+                        pending = b""
+                        async for chunk in audio_data:
+                            if pending:
+                                chunk = pending + chunk
+                            usable = len(chunk) & ~1
+                            pending = chunk[usable:]
+                            if usable:
+                                await send_chunk(chunk[:usable])
+                    else:
+                        total_chunks = (len(audio_data) + CHUNK_BYTES - 1) // CHUNK_BYTES
+                        logger.info(f"Sending {total_chunks} audio chunks of {CHUNK_BYTES} bytes each")
                         
-                        if (i // chunk_size) % 10 == 0:  # Log every 10th chunk
-                            logger.debug(f"Sent chunk {i // chunk_size + 1}/{total_chunks}")
+                        # Pre-recorded audio is sent as fast as send_audio_event's flow control
+                        # allows unless realtime is set. Slicing a memoryview avoids copying
+                        # each chunk; the event encoder accepts any bytes-like payload.
+                        audio_view = memoryview(audio_data)
+                        for i in range(0, len(audio_view), CHUNK_BYTES):
+                            await send_chunk(audio_view[i:i + CHUNK_BYTES])
+                            
+                            if (i // CHUNK_BYTES) % 10 == 0:  # Log every 10th chunk
+                                logger.debug(f"Sent chunk {i // CHUNK_BYTES + 1}/{total_chunks}")
                     
                     logger.info("All audio chunks sent, ending stream")
+                    # handle_events keeps running until the service closes the output
+                    # stream after the final results, so no extra wait is needed here
                     await stream.input_stream.end_stream()
                     
-                    # Give some time for final processing
-                    await asyncio.sleep(1.0)
-                    
                 except Exception as e:
                     logger.error(f"Error sending audio: {str(e)}")
                     raise
             
-            # Process transcription with timeout
+            async def watchdog():
+                # Returns only when the stream has stalled; long audio that keeps moving runs to completion
+                while time.monotonic() - handler.last_activity <= STREAM_IDLE_TIMEOUT:
+                    await asyncio.sleep(STREAM_WATCHDOG_POLL)
+            
+            # Process transcription, bailing out only if the stream goes idle
             logger.info("Starting audio processing and event handling")
+            work = asyncio.gather(send_audio(), handler.handle_events())
+            stall = asyncio.ensure_future(watchdog())
             try:
-                # Add timeout to prevent hanging
-                await asyncio.wait_for(
-                    asyncio.gather(send_audio(), handler.handle_events()),
-                    timeout=60.0  # 60 second timeout
-                )
-            except asyncio.TimeoutError:
-                logger.error("Transcription timed out after 60 seconds")
+                await asyncio.wait({work, stall}, return_when=asyncio.FIRST_COMPLETED)
+            except BaseException:
+                work.cancel()
+                raise
+            finally:
+                stall.cancel()
+            
+            if not work.done():
+                work.cancel()
+                try:
+                    await work
+                except asyncio.CancelledError:
+                    pass
+                logger.error(f"Transcription stalled: no audio sent or results received for {STREAM_IDLE_TIMEOUT:.0f} seconds")
                 raise RuntimeError("Transcription timed out")
+            await work  # Re-raise any error from sending or event handling
             
             # Finalize transcript - use partial result if no final result was received
             handler.finalize_transcript()
@@ -340,30 +594,45 @@ class AudioTranscriber:
         # For now, we'll focus on the streaming approach
         raise NotImplementedError("Batch transcription requires S3 setup. Use streaming instead.")
     
-    async def transcribe_mp3_file(self, mp3_data: bytes, 
-                                language_options: List[str] = None) -> TranscriptionResult:
+    async def transcribe_audio_data(self, audio_data: bytes, 
+                                  language_options: List[str] = None,
+                                  on_confirmed: Optional[Callable[[str], None]] = None,
+                                  language: Optional[str] = None) -> TranscriptionResult:
         """
-        Transcribe an MP3 file with automatic language detection.
+        Transcribe compressed audio (MP3, FLAC, OGG, M4A) with automatic language detection.
         
         Args:
-            mp3_data: MP3 file data as bytes
+            audio_data: Audio file data as bytes
             language_options: List of language codes to consider (default: en-US, id-ID)
+            on_confirmed: Optional callback receiving transcript text as soon as it is confirmed
+            language: Known language code; skips language identification when given
             
         Returns:
             TranscriptionResult object with transcript and detected language
         """
+        if language:
+            language_options = [language]
+        
         try:
-            # Convert MP3 to WAV format
-            logger.info("Converting MP3 to WAV format...")
-            wav_data = self._convert_mp3_to_wav(mp3_data)
+            if self.streaming_client and FFMPEG_PATH:
+                # Decode straight into the stream so decoding overlaps with upload
+                logger.info("Starting streaming transcription from ffmpeg PCM output...")
+                result = await self.transcribe_streaming(self._decode_to_pcm_stream(audio_data), language_options, on_confirmed)
+                logger.info(f"Transcription completed. Language: {result.language_code}")
+                return result
+            
+            # Convert to raw PCM
+            logger.info("Converting audio to PCM...")
+            # pydub blocks on ffmpeg; decode on a worker thread so other transcriptions keep running
+            pcm_data = await asyncio.to_thread(self._convert_to_pcm, audio_data)
             
             # Use streaming transcription if available
             if self.streaming_client:
                 logger.info("Starting streaming transcription...")
-                result = await self.transcribe_streaming(wav_data, language_options)
+                result = await self.transcribe_streaming(pcm_data, language_options, on_confirmed)
             else:
                 logger.info("Streaming not available, using batch transcription...")
-                result = self.transcribe_batch(wav_data, language_options)
+                result = self.transcribe_batch(pcm_data, language_options)
             
             logger.info(f"Transcription completed. Language: {result.language_code}")
             return result
@@ -372,30 +641,55 @@ class AudioTranscriber:
             logger.error(f"Transcription failed: {str(e)}")
             raise
     
+    async def transcribe_mp3_file(self, mp3_data: bytes, 
+                                language_options: List[str] = None,
+                                on_confirmed: Optional[Callable[[str], None]] = None,
+                                language: Optional[str] = None) -> TranscriptionResult:
+        """
+        Transcribe an MP3 file with automatic language detection.
+        
+        Args:
+            mp3_data: MP3 file data as bytes
+            language_options: List of language codes to consider (default: en-US, id-ID)
+            on_confirmed: Optional callback receiving transcript text as soon as it is confirmed
+            language: Known language code; skips language identification when given
+            
+        Returns:
+            TranscriptionResult object with transcript and detected language
+        """
+        return await self.transcribe_audio_data(mp3_data, language_options, on_confirmed, language)
+    
     async def transcribe_wav_file(self, wav_data: bytes, 
-                                language_options: List[str] = None) -> TranscriptionResult:
+                                language_options: List[str] = None,
+                                on_confirmed: Optional[Callable[[str], None]] = None,
+                                language: Optional[str] = None) -> TranscriptionResult:
         """
         Transcribe a WAV file with automatic language detection.
         
         Args:
             wav_data: WAV file data as bytes
             language_options: List of language codes to consider (default: en-US, id-ID)
+            on_confirmed: Optional callback receiving transcript text as soon as it is confirmed
+            language: Known language code; skips language identification when given
             
         Returns:
             TranscriptionResult object with transcript and detected language
         """
+        if language:
+            language_options = [language]
+        
         try:
             # Process WAV data to ensure it's in the correct format
             logger.info("Processing WAV file format...")
-            processed_wav_data = self._process_wav_format(wav_data)
+            pcm_data = await asyncio.to_thread(self._process_wav_format, wav_data)
             
             # Use streaming transcription if available
             if self.streaming_client:
                 logger.info("Starting streaming transcription...")
-                result = await self.transcribe_streaming(processed_wav_data, language_options)
+                result = await self.transcribe_streaming(pcm_data, language_options, on_confirmed)
             else:
                 logger.info("Streaming not available, using batch transcription...")
-                result = self.transcribe_batch(processed_wav_data, language_options)
+                result = self.transcribe_batch(pcm_data, language_options)
             
             logger.info(f"Transcription completed. Language: {result.language_code}")
             return result
@@ -404,6 +698,32 @@ class AudioTranscriber:
             logger.error(f"Transcription failed: {str(e)}")
             raise
     
+    def _process_wav_format_numpy(self, wav_data: bytes) -> bytes:
+        """
+        Resample and downmix WAV data with soundfile/soxr instead of ffmpeg.
+        
+        Args:
+            wav_data: WAV file data as bytes
+            
+        Returns:
+            Raw PCM data as bytes (16kHz, mono, 16-bit little-endian, no header)
+        """
+        audio, sample_rate = sf.read(_as_file(wav_data), dtype='float32', always_2d=True)
+        logger.info(f"Original audio format: {sample_rate}Hz, {audio.shape[1]} channels")
+        
+        mono = audio.mean(axis=1)
+        if sample_rate != 16000:
+            mono = soxr.resample(mono, sample_rate, 16000)
+        
+        # Peak-normalize with 0.1 dB headroom, as pydub's normalize() does
+        peak = float(np.abs(mono).max()) if mono.size else 0.0
+        if peak > 0:
+            mono = mono * (10 ** (-0.1 / 20) / peak)
+        
+        pcm_data = np.clip(mono * 32767, -32768, 32767).astype('<i2').tobytes()
+        logger.info(f"Audio duration: {len(pcm_data) / 32000:.2f} seconds")
+        return pcm_data
+    
     def _process_wav_format(self, wav_data: bytes) -> bytes:
         """
         Process WAV data to ensure it's in the correct format for transcription.
@@ -412,17 +732,23 @@ class AudioTranscriber:
             wav_data: WAV file data as bytes
             
         Returns:
-            Processed WAV file data as bytes (16kHz, mono, 16-bit PCM)
+            Raw PCM data as bytes (16kHz, mono, 16-bit, no WAV header)
         """
+        if NUMPY_AUDIO_AVAILABLE:
+            try:
+                return self._process_wav_format_numpy(wav_data)
+            except Exception as e:
+                logger.warning(f"soundfile/soxr processing failed, falling back to pydub: {str(e)}")
+        
         if not PYDUB_AVAILABLE:
-            logger.warning("pydub not available. Using WAV file as-is (may cause issues if format is incorrect)")
-            return wav_data
+            logger.warning("pydub not available. Using WAV samples as-is (may cause issues if format is incorrect)")
+            return _wav_frames(wav_data)
         
         try:
             logger.info("Processing WAV file format for streaming transcription...")
             
             # Load WAV from bytes
-            audio = AudioSegment.from_wav(io.BytesIO(wav_data))
+            audio = AudioSegment.from_wav(_as_file(wav_data))
             
             # Log original format
             logger.info(f"Original audio format: {audio.frame_rate}Hz, {audio.channels} channels, {audio.sample_width*8}-bit")
@@ -439,40 +765,184 @@ class AudioTranscriber:
             logger.info(f"Converted audio format: {audio.frame_rate}Hz, {audio.channels} channels, {audio.sample_width*8}-bit")
             logger.info(f"Audio duration: {len(audio)/1000:.2f} seconds")
             
-            # Export to WAV format with specific parameters for streaming
-            wav_buffer = io.BytesIO()
-            audio.export(
-                wav_buffer, 
-                format="wav",
-                parameters=[
-                    "-acodec", "pcm_s16le",  # 16-bit PCM little-endian
-                    "-ar", "16000",          # 16kHz sample rate
-                    "-ac", "1"               # Mono
-                ]
-            )
-            wav_buffer.seek(0)
-            
-            processed_data = wav_buffer.read()
-            logger.info(f"Processed WAV data size: {len(processed_data)} bytes")
+            # The samples are already 16kHz mono pcm_s16le; send them without a WAV
+            # header, since media_encoding="pcm" would treat the header as audio
+            processed_data = audio.raw_data
+            logger.info(f"Processed PCM data size: {len(processed_data)} bytes")
             
             return processed_data
             
         except Exception as e:
             logger.error(f"Failed to process WAV format: {str(e)}")
             logger.error("This might cause transcription issues. Consider using a different audio file.")
-            # Return original data as fallback
-            return wav_data
+            # Return original samples as fallback
+            return _wav_frames(wav_data)
+
+@lru_cache(maxsize=2)
+def _load_whisper_model(model_size: str) -> "WhisperModel":
+    """Load a faster-whisper model once per size (int8 quantized)."""
+    logger.info(f"Loading faster-whisper model '{model_size}' (int8)...")
+    return WhisperModel(model_size, device="auto", compute_type="int8")
+
+class LocalWhisperTranscriber:
+    """
+    On-box transcription backend using faster-whisper.
+    
+    Exposes the same transcribe_audio_data / transcribe_mp3_file / transcribe_wav_file interface as
+    AudioTranscriber, so it can be used wherever AWS Transcribe is not available.
+    """
+    
+    def __init__(self, model_size: str = "small", batch_size: int = 8):
+        """
+        Initialize the local transcriber.
+        
+        Args:
+            model_size: faster-whisper model size (e.g. tiny, base, small)
+            batch_size: Number of audio chunks decoded per batch
+        """
+        if not FASTER_WHISPER_AVAILABLE:
+            raise RuntimeError("faster-whisper is required for local transcription. Please install it with: pip install faster-whisper")
+        
+        self.model = _load_whisper_model(model_size)
+        self.batch_size = batch_size
+        
+        try:
+            from faster_whisper import BatchedInferencePipeline
+            self.pipeline = BatchedInferencePipeline(model=self.model)
+        except ImportError:
+            # Older faster-whisper releases have no batched pipeline
+            self.pipeline = None
+    
+    def _transcribe(self, audio_data: bytes, language_options: List[str] = None) -> TranscriptionResult:
+        """
+        Transcribe audio data synchronously.
+        
+        Args:
+            audio_data: Audio file data (any format ffmpeg can decode)
+            language_options: List of language codes to consider
+            
+        Returns:
+            TranscriptionResult object
+        """
+        # Whisper uses bare language codes; pin the language when only one is allowed
+        language = None
+        if language_options and len(language_options) == 1:
+            language = language_options[0].split('-')[0]
+        
+        audio = _as_file(audio_data)
+        if self.pipeline is not None:
+            segments, info = self.pipeline.transcribe(audio, language=language, batch_size=self.batch_size)
+        else:
+            segments, info = self.model.transcribe(audio, language=language)
+        
+        result = TranscriptionResult()
+        for segment in segments:
+            text = segment.text.strip()
+            if not text:
+                continue
+            result.segments.append({
+                'transcript': text,
+                'confidence': None,
+                'start_time': segment.start,
+                'end_time': segment.end
+            })
+        
+        result.transcript = " ".join(segment['transcript'] for segment in result.segments)
+        result.confidence = info.language_probability
+        
+        # Map the detected language back to the caller's locale code when possible
+        result.language_code = info.language
+        for option in language_options or []:
+            if option.split('-')[0] == info.language:
+                result.language_code = option
+                break
+        
+        result.is_complete = True
+        return result
+    
+    async def transcribe_audio_data(self, audio_data: bytes, 
+                                  language_options: List[str] = None,
+                                  on_confirmed: Optional[Callable[[str], None]] = None,
+                                  language: Optional[str] = None) -> TranscriptionResult:
+        """
+        Transcribe audio in any format ffmpeg can decode, with automatic language detection.
+        
+        Args:
+            audio_data: Audio file data as bytes
+            language_options: List of language codes to consider
+            on_confirmed: Optional callback receiving the transcript once complete
+            language: Known language code; skips language detection when given
+            
+        Returns:
+            TranscriptionResult object with transcript and detected language
+        """
+        if language:
+            language_options = [language]
+        result = await asyncio.to_thread(self._transcribe, audio_data, language_options)
+        if on_confirmed and result.transcript:
+            on_confirmed(result.transcript)
+        return result
+    
+    async def transcribe_mp3_file(self, mp3_data: bytes, 
+                                language_options: List[str] = None,
+                                on_confirmed: Optional[Callable[[str], None]] = None,
+                                language: Optional[str] = None) -> TranscriptionResult:
+        """
+        Transcribe an MP3 file with automatic language detection.
+        
+        Args:
+            mp3_data: MP3 file data as bytes
+            language_options: List of language codes to consider
+            on_confirmed: Optional callback receiving the transcript once complete
+            language: Known language code; skips language detection when given
+            
+        Returns:
+            TranscriptionResult object with transcript and detected language
+        """
+        return await self.transcribe_audio_data(mp3_data, language_options, on_confirmed, language)
+    
+    async def transcribe_wav_file(self, wav_data: bytes, 
+                                language_options: List[str] = None,
+                                on_confirmed: Optional[Callable[[str], None]] = None,
+                                language: Optional[str] = None) -> TranscriptionResult:
+        """
+        Transcribe a WAV file with automatic language detection.
+        
+        Args:
+            wav_data: WAV file data as bytes
+            language_options: List of language codes to consider
+            on_confirmed: Optional callback receiving the transcript once complete
+            language: Known language code; skips language detection when given
+            
+        Returns:
+            TranscriptionResult object with transcript and detected language
+        """
+        return await self.transcribe_audio_data(wav_data, language_options, on_confirmed, language)
 
-def create_transcriber(region: str = "ap-southeast-1") -> AudioTranscriber:
+def _has_aws_credentials() -> bool:
+    """Return whether boto3 can find AWS credentials."""
+    try:
+        return boto3.Session().get_credentials() is not None
+    except Exception:
+        return False
+
+@lru_cache(maxsize=4)
+def create_transcriber(region: str = "ap-southeast-1"):
     """
-    Factory function to create an AudioTranscriber instance.
+    Factory function to create a transcriber instance.
+    
+    Uses the on-box faster-whisper backend when region is "local", or when no
+    AWS credentials are configured and faster-whisper is installed. Instances
+    are cached per region so their clients are reused across calls.
     
     Args:
-        region: AWS region for Transcribe service
+        region: AWS region for Transcribe service, or "local"
         
     Returns:
-        AudioTranscriber instance
+        AudioTranscriber or LocalWhisperTranscriber instance
     """
+    if region == LOCAL_REGION or (FASTER_WHISPER_AVAILABLE and not _has_aws_credentials()):
+        return LocalWhisperTranscriber()
     return AudioTranscriber(region=region)
 
 # Example usage
@@ -491,10 +961,35 @@ async def example_usage():
     print(f"Language: {result.language_code}")
     print(f"Confidence: {result.confidence}")
 
+def _map_file(file_path: str):
+    """
+    Memory-map a file read-only instead of copying it into memory.
+    
+    The mapping stays valid after the file is closed. Empty files cannot be
+    mapped and are returned as empty bytes. The ffmpeg, wave and soundfile
+    paths read the mapping in place; pydub still loads the whole file.
+    """
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
 # Convenience functions for app integration
-def transcribe_audio_file_sync(file_path: str, language_options: list = None, region: str = "ap-southeast-1"):
+async def transcribe_audio_bytes_async(audio_data: bytes, file_extension: str, language_options: list = None,
+                                       region: str = "ap-southeast-1",
+                                       on_confirmed: Optional[Callable[[str], None]] = None,
+                                       transcriber=None, language: Optional[str] = None):
     """
-    Synchronous audio transcription using extensions.
+    Asynchronous transcription of in-memory audio data.
+    
+    The bytes are streamed to Transcribe directly, so callers holding an
+    upload in memory never need to write it to disk. If on_confirmed is
+    given, it receives transcript fragments as soon as they are confirmed.
+    An existing transcriber may be passed to reuse its clients, and a known
+    language skips language identification. The format is detected from the
+    content's magic bytes, with file_extension used only when they are not
+    recognized.
+    Returns the same result dictionary as transcribe_audio_file_sync.
     """
     try:
         # Set default language options
@@ -502,44 +997,55 @@ def transcribe_audio_file_sync(file_path: str, language_options: list = None, re
             language_options = ["en-US", "id-ID"]
         
         # Create transcriber
-        transcriber = create_transcriber(region=region)
-        
-        # Read the audio file
-        with open(file_path, "rb") as f:
-            audio_data = f.read()
+        if transcriber is None:
+            transcriber = create_transcriber(region=region)
         
-        # Determine file type and transcribe
-        file_extension = file_path.lower().split('.')[-1]
+        audio_format = _sniff_audio_format(audio_data[:12]) or file_extension.lower().lstrip('.')
         
-        # Run async transcription
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        if file_extension == 'mp3':
-            result = loop.run_until_complete(transcriber.transcribe_mp3_file(audio_data, language_options))
-        elif file_extension == 'wav':
-            result = loop.run_until_complete(transcriber.transcribe_wav_file(audio_data, language_options))
+        if audio_format == 'wav':
+            result = await transcriber.transcribe_wav_file(audio_data, language_options, on_confirmed, language)
+        elif audio_format in DECODED_FORMATS:
+            result = await transcriber.transcribe_audio_data(audio_data, language_options, on_confirmed, language)
         else:
             return {
                 "status": "error",
-                "message": f"Unsupported file format: {file_extension}",
+                "message": f"Unsupported file format: {audio_format}",
                 "transcript": "",
                 "language_code": None,
                 "confidence": None,
                 "segments": []
             }
         
-        loop.close()
-        
         return {
             "status": "success",
-            "message": f"Successfully transcribed {file_extension.upper()} audio file. Detected language: {result.language_code}",
+            "message": f"Successfully transcribed {audio_format.upper()} audio file. Detected language: {result.language_code}",
             "transcript": result.transcript,
             "language_code": result.language_code,
             "confidence": result.confidence,
             "segments": result.segments
         }
         
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Transcription failed: {str(e)}",
+            "transcript": "",
+            "language_code": None,
+            "confidence": None,
+            "segments": []
+        }
+
+async def transcribe_audio_file_async(file_path: str, language_options: list = None, region: str = "ap-southeast-1",
+                                      transcriber=None, language: Optional[str] = None):
+    """
+    Asynchronous audio transcription using extensions.
+    
+    Lets callers overlap transcription with other work on the same event loop.
+    Returns the same result dictionary as transcribe_audio_file_sync.
+    """
+    try:
+        # Map the audio file without blocking the event loop
+        audio_data = await asyncio.to_thread(_map_file, file_path)
     except FileNotFoundError:
         return {
             "status": "error",
@@ -558,10 +1064,66 @@ def transcribe_audio_file_sync(file_path: str, language_options: list = None, re
             "confidence": None,
             "segments": []
         }
+    
+    # The content decides the format; the extension is only a fallback
+    file_extension = os.path.splitext(file_path)[1]
+    try:
+        return await transcribe_audio_bytes_async(audio_data, file_extension, language_options, region,
+                                                  transcriber=transcriber, language=language)
+    finally:
+        if isinstance(audio_data, mmap.mmap):
+            try:
+                audio_data.close()
+            except BufferError:
+                pass  # A slice is still referenced; the mapping is released with it
 
+async def transcribe_audio_files_async(file_paths: List[str], language_options: list = None,
+                                       region: str = "ap-southeast-1", max_concurrent: int = 10):
+    """
+    Transcribe several audio files concurrently.
+    
+    At most max_concurrent streams are open at once, and all files share a
+    single transcriber. Returns one result dictionary per file, in order.
+    """
+    transcriber = create_transcriber(region=region)
+    semaphore = asyncio.Semaphore(max_concurrent)
+    
+    async def transcribe_one(file_path: str):
+        async with semaphore:
+            return await transcribe_audio_file_async(file_path, language_options, region, transcriber=transcriber)
+    
+    return await asyncio.gather(*(transcribe_one(file_path) for file_path in file_paths))
+
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    """Return a shared event loop running on a daemon thread, starting it on first use."""
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(target=_background_loop.run_forever, name="audio-transcriber-loop", daemon=True).start()
+        return _background_loop
+
+def transcribe_audio_file_sync(file_path: str, language_options: list = None, region: str = "ap-southeast-1",
+                               language: Optional[str] = None):
+    """
+    Synchronous audio transcription using extensions.
+    """
+    # Run async transcription on the shared loop instead of creating one per call
+    future = asyncio.run_coroutine_threadsafe(
+        transcribe_audio_file_async(file_path, language_options, region, language=language),
+        _get_background_loop()
+    )
+    return future.result()
+
+@lru_cache(maxsize=1)
 def get_supported_languages():
     """
     Get supported languages for audio transcription.
+    
+    The result is built once and shared; callers should not mutate it.
     """
     return {
         "status": "success",
@@ -574,7 +1136,7 @@ def get_supported_languages():
             "th-TH": "Thai",
             "vi-VN": "Vietnamese"
         },
-        "supported_formats": ["mp3", "wav"],
+        "supported_formats": ["mp3", "wav", "flac", "ogg", "m4a"],
         "default_options": ["en-US", "id-ID"],
         "message": "These are the supported languages and formats for audio transcription"
     }
@@ -6,12 +6,115 @@ with streaming responses, thinking process visualization, and tool execution.
 """
 
 import time
+import queue
 import logging
+import threading
 import streamlit as st
+from collections import OrderedDict
 from typing import Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
 
+# Thinking bubble markup; only the content between the wrappers changes per update
+_THINK_WRAP_OPEN = '<div style="background-color: rgba(67, 97, 238, 0.1); padding: 10px; border-left: 4px solid #4361ee; border-radius: 4px; color: var(--text-color, currentColor);">\n'
+_THINK_WRAP_CLOSE = '\n</div>\n'
+# Handler method names, keyed by the event argument they consume
+_EVENT_HANDLERS = {
+    "reasoningText": "_on_reasoning_text",
+    "reasoning_signature": "_on_reasoning_signature",
+    "thinking_start": "_on_thinking_start",
+    "thinking": "_on_thinking",
+    "thinking_end": "_on_thinking_end",
+    "delta": "_on_delta",
+    "content_block_delta": "_on_content_block_delta",
+    "data": "_on_data",
+    "content_block_start": "_on_content_block_start",
+    "message": "_on_message",
+    "tool_use": "_on_tool_use",
+    "tool_result": "_on_tool_result",
+    "event": "_on_event",
+}
+_EVENT_KEYS = frozenset(_EVENT_HANDLERS)
+
+# Handled keys of plain text and reasoning delta events, which run_agent may merge
+_TEXT_EVENT_KEYS = frozenset({"data", "delta"})
+_REASONING_EVENT_KEYS = frozenset({"reasoningText", "delta"})
+
+# Queued after the agent's last event by run_agent
+_STREAM_DONE = object()
+
+# Most tool calls/results kept while waiting for their counterpart
+_MAX_TRACKED_TOOLS = 64
+
+_THINK_END_FOOTER = '<p style="color: var(--text-color, currentColor);"><em>End of thinking process</em></p>\n'
+
+def _prep_chart(json_data):
+    """Return bar chart data for {"labels": ..., "values": ...} payloads, or None."""
+    if isinstance(json_data, dict) and "labels" in json_data and "values" in json_data:
+        return {"x": json_data["labels"], "y": json_data["values"]}
+    return None
+
+def _log_text_block(text, handler, text_parts):
+    """Collect a message's text block."""
+    text_parts.append(text)
+
+def _log_tool_use_block(tool_use, handler, text_parts):
+    """Record and trace a message's toolUse block."""
+    tool_id = tool_use.get("toolUseId", "unknown")
+    handler._track_tool_call(tool_id, tool_use)
+    logger.debug("[ReAct - ACTION] Tool: %s, Input: %s", tool_use.get('name'), tool_use.get('input'))
+
+def _log_tool_result_block(tool_result, handler, text_parts):
+    """Record and trace a message's toolResult block."""
+    tool_id = tool_result.get("toolUseId", "unknown")
+    handler._track_tool_result(tool_id, tool_result)
+    logger.debug("[ReAct - OBSERVATION] Tool: %s, Status: %s", tool_id, tool_result.get('status'))
+    if "content" in tool_result:
+        logger.debug("[ReAct - OBSERVATION CONTENT] %s", tool_result['content'])
+
+# Message content block handlers, keyed by block kind
+_BLOCK_HANDLERS = {
+    "text": _log_text_block,
+    "toolUse": _log_tool_use_block,
+    "toolResult": _log_tool_result_block,
+}
+_BLOCK_KINDS = frozenset(_BLOCK_HANDLERS)
+
+def _text_kind(event):
+    """Return "data" or "reasoningText" for plain text delta events, else None."""
+    if event is _STREAM_DONE:
+        return None
+    handled = _EVENT_KEYS.intersection(event)
+    if handled <= _TEXT_EVENT_KEYS and isinstance(event.get("data"), str):
+        return "data"
+    if handled <= _REASONING_EVENT_KEYS and isinstance(event.get("reasoningText"), str):
+        return "reasoningText"
+    return None
+
+def _merged_event(kind, parts):
+    """Build one event carrying the concatenated text of a run of delta events."""
+    text = "".join(parts)
+    if kind == "data":
+        return {"data": text, "delta": {"text": text}}
+    return {"reasoningText": text, "reasoning": True}
+
+def _coalesce_events(events):
+    """Yield events in order, merging consecutive text (or reasoning) deltas into one."""
+    run_kind = None
+    parts = []
+    for event in events:
+        kind = _text_kind(event)
+        if parts and kind != run_kind:
+            yield _merged_event(run_kind, parts)
+            parts = []
+        run_kind = kind
+        if kind is None:
+            yield event
+        else:
+            parts.append(event[kind])
+    if parts:
+        yield _merged_event(run_kind, parts)
+
 class StreamlitHandler:
     """
     Callback handler for Strands agents that updates a Streamlit UI.
@@ -23,207 +126,283 @@ class StreamlitHandler:
     
     Attributes:
         placeholder: Streamlit placeholder for displaying content
-        update_interval: Time between UI updates (seconds)
+        update_interval: Longest time buffered text waits before a UI update (seconds)
+        flush_chars: Number of buffered characters that triggers a UI update
+        min_render_interval: Shortest time between two UI updates (seconds)
     """
     
-    def __init__(self, placeholder, update_interval=0.1):
+    def __init__(self, placeholder, update_interval=0.1, flush_chars=24, min_render_interval=0.05):
         """
         Initialize the Streamlit handler.
         
         Args:
             placeholder: Streamlit placeholder for displaying content
-            update_interval: Time between UI updates (seconds)
+            update_interval: Longest time buffered text waits before a UI update (seconds)
+            flush_chars: Number of buffered characters that triggers a UI update
+            min_render_interval: Shortest time between two UI updates (seconds)
         """
         self.placeholder = placeholder
+        # Streamed text is appended to part lists and joined only when read
+        self._message_parts = []
+        self._thinking_parts = []
         self.message_container = ""
         self.thinking_container = ""
         self.is_thinking = False
-        self.last_update_time = time.time()
         self.update_interval = update_interval
+        self.flush_chars = flush_chars
+        self.min_render_interval = min_render_interval
+        self.pending_chars = 0  # Characters received since the last UI update
+        self._queue = None  # Events from the agent thread, set by run_agent
+        self._stopped = False
+        self._mark_rendered()  # Sets the redraw deadlines
+        # Completed paragraphs are rendered once; only the text after them is redrawn
+        self.message_area = None
+        self.live_placeholder = None
+        self.settled_chars = 0
+        self.settled_fences = 0
         self.tool_containers = {}
+        self.rendered_tool_results = set()  # Tool use IDs whose result has been displayed
         self.thinking_placeholder = None
         # Add a flag to track if thinking content has been preserved
         self.thinking_preserved = False
         # Store the thinking content in session state to persist across rerenders
-        if "thinking_content" not in st.session_state:
-            st.session_state.thinking_content = ""
+        st.session_state.setdefault("thinking_content", "")
+        st.session_state.setdefault("thinking_history", [])
         
         # Add buffers for collecting complete messages
-        self.current_reasoning = ""
+        self.current_reasoning = []
         self.current_message = ""
-        self.delta_buffer = ""
-        self.current_tool_calls = {}  # Track tool calls by ID
-        self.current_tool_results = {}  # Track tool results by ID
+        self.delta_buffer = []
+        self.current_tool_calls = OrderedDict()  # Unpaired tool calls by ID, oldest first
+        self.current_tool_results = OrderedDict()  # Unpaired tool results by ID, oldest first
+        
+        # Bound event handlers; each one does the ReAct logging and the UI
+        # update for its event in a single pass
+        self._handlers = {key: getattr(self, name) for key, name in _EVENT_HANDLERS.items()}
+        # Bound once so the per-token path skips method lookup and binding
+        self._stream_text = self._handle_text_streaming
+        self._ui_flush = self._update_ui_if_needed
         
     def __call__(self, **kwargs):
         """
         Process events from the Strands agent with enhanced ReAct context logging.
         
+        ReAct traces are logged at DEBUG; when that level is disabled the
+        trace-only bookkeeping is skipped as well.
+        
         Args:
             **kwargs: Event data from the agent
         """
-        # Get event type
-        event_type = next((k for k in kwargs.keys() if k not in ["data", "content_block_delta"]), None)
-        
         # Handle initialization - reset buffers
         if "init_event_loop" in kwargs:
-            print("[ReAct - START] New interaction started")
-            self.current_reasoning = ""
+            logger.debug("[ReAct - START] New interaction started")
+            self.current_reasoning = []
             self.current_message = ""
-            self.delta_buffer = ""
-            self.current_tool_calls = {}
-            self.current_tool_results = {}
+            self.delta_buffer = []
+            self.current_tool_calls.clear()
+            self.current_tool_results.clear()
             self._handle_initialization()
             return
-            
-        # Handle reasoning text - collect complete reasoning
-        if event_type == "reasoningText":
-            reasoning_text = kwargs.get("reasoningText", "")
-            if isinstance(reasoning_text, dict) and "text" in reasoning_text:
-                reasoning_text = reasoning_text["text"]
-            self.current_reasoning += str(reasoning_text)
-            
-        # When reasoning is complete, output the full reasoning
-        elif event_type == "reasoning_signature":
-            if self.current_reasoning:
-                print(f"[ReAct - REASONING COMPLETE]\n{self.current_reasoning}")
-                self.current_reasoning = ""  # Reset after printing
-                
-        # Handle delta events - collect content but don't print every delta
-        elif event_type == "delta":
-            delta_content = kwargs.get("delta", {}).get("text", "")
+        
+        # One C-level set intersection finds the handlers for this event
+        handlers = self._handlers
+        for key in _EVENT_KEYS.intersection(kwargs):
+            handlers[key](kwargs[key], kwargs)
+    
+    @property
+    def message_container(self):
+        """The streamed response text so far."""
+        if len(self._message_parts) > 1:
+            # Collapse to one part so later reads only join what arrived since
+            self._message_parts[:] = ["".join(self._message_parts)]
+        return self._message_parts[0] if self._message_parts else ""
+    
+    @message_container.setter
+    def message_container(self, text):
+        self._message_parts = [text] if text else []
+    
+    @property
+    def thinking_container(self):
+        """The streamed thinking text so far."""
+        if len(self._thinking_parts) > 1:
+            self._thinking_parts[:] = ["".join(self._thinking_parts)]
+        return self._thinking_parts[0] if self._thinking_parts else ""
+    
+    @thinking_container.setter
+    def thinking_container(self, text):
+        self._thinking_parts = [text] if text else []
+    
+    def _on_reasoning_text(self, reasoning_text, kwargs):
+        """Collect reasoning text and show it in the thinking panel."""
+        # Normalize once; str() only runs for unexpected payload types
+        if isinstance(reasoning_text, dict):
+            reasoning_text = reasoning_text.get("text", "")
+        elif not isinstance(reasoning_text, str):
+            logger.debug("Unexpected reasoningText structure: %s", reasoning_text)
+            reasoning_text = str(reasoning_text)
+        if logger.isEnabledFor(logging.DEBUG):
+            self.current_reasoning.append(reasoning_text)
+        self._handle_thinking_content(reasoning_text)
+    
+    def _on_reasoning_signature(self, signature, kwargs):
+        """Output the full reasoning and close the thinking panel."""
+        if self.current_reasoning:
+            logger.debug("[ReAct - REASONING COMPLETE]\n%s", ''.join(self.current_reasoning))
+            self.current_reasoning = []  # Reset after printing
+        self._handle_thinking_end()
+    
+    def _on_thinking_start(self, value, kwargs):
+        """Handle the legacy thinking_start event."""
+        self._handle_thinking_start()
+    
+    def _on_thinking(self, thinking_data, kwargs):
+        """Handle the legacy thinking event."""
+        self._handle_thinking(thinking_data)
+    
+    def _on_thinking_end(self, value, kwargs):
+        """Handle the legacy thinking_end event."""
+        self._handle_thinking_end()
+    
+    def _on_delta(self, delta, kwargs):
+        """Collect delta content for the trace without printing every delta."""
+        if logger.isEnabledFor(logging.DEBUG):
+            delta_content = delta.get("text", "") if isinstance(delta, dict) else ""
             if delta_content:
-                self.delta_buffer += delta_content
-                
-        # Handle message events - output complete messages
-        elif event_type == "message":
-            message = kwargs.get("message", {})
-            if isinstance(message, dict) and "content" in message:
-                content = message["content"]
-                full_text = ""
-                
-                # Extract text from content blocks
-                if isinstance(content, list):
-                    for block in content:
-                        if isinstance(block, dict):
-                            if "text" in block:
-                                full_text += block["text"]
-                            elif "toolUse" in block:
-                                tool_use = block["toolUse"]
-                                tool_id = tool_use.get("toolUseId", "unknown")
-                                self.current_tool_calls[tool_id] = tool_use
-                                print(f"[ReAct - ACTION] Tool: {tool_use.get('name')}, Input: {tool_use.get('input')}")
-                            elif "toolResult" in block:
-                                tool_result = block["toolResult"]
-                                tool_id = tool_result.get("toolUseId", "unknown")
-                                self.current_tool_results[tool_id] = tool_result
-                                print(f"[ReAct - OBSERVATION] Tool: {tool_id}, Status: {tool_result.get('status')}")
-                                if "content" in tool_result:
-                                    print(f"[ReAct - OBSERVATION CONTENT] {tool_result['content']}")
-                
-                # Print the complete message if it's not empty
-                if full_text:
-                    print(f"[COMPLETE MESSAGE]\n{full_text}")
-                    
-                # Also print any buffered delta content if it wasn't part of a message
-                if self.delta_buffer:
-                    print(f"[COMPLETE DELTA CONTENT]\n{self.delta_buffer}")
-                    self.delta_buffer = ""  # Reset buffer
-                    
-        # Handle direct tool events
-        elif "tool_use" in kwargs:
-            tool_use = kwargs["tool_use"]
-            tool_id = tool_use.get("toolUseId", "unknown")
-            self.current_tool_calls[tool_id] = tool_use
-            print(f"[ReAct - ACTION DIRECT] Tool: {tool_use.get('name')}, Input: {tool_use.get('input')}")
+                self.delta_buffer.append(delta_content)
+    
+    def _on_content_block_delta(self, delta, kwargs):
+        """Stream text from the content_block_delta format."""
+        if "delta" in delta and "text" in delta["delta"]:
+            self._stream_text(delta["delta"]["text"])
+    
+    def _on_data(self, data, kwargs):
+        """Stream text from the data format."""
+        if "content_block_delta" in kwargs:
+            return  # content_block_delta carries the same text
+        if isinstance(data, str):
+            self._stream_text(data)
+        elif isinstance(data, dict) and "delta" in data:
+            delta = data["delta"]
+            if isinstance(delta, dict) and "text" in delta:
+                self._stream_text(delta["text"])
+    
+    def _on_content_block_start(self, value, kwargs):
+        """Draw any accumulated text before a new content block begins."""
+        self._flush_before_tool()
+    
+    def _on_message(self, message, kwargs):
+        """Output a complete message and keep the thinking content visible."""
+        if logger.isEnabledFor(logging.DEBUG) and isinstance(message, dict) and "content" in message:
+            content = message["content"]
+            text_parts = []
             
-        elif "tool_result" in kwargs:
-            tool_result = kwargs["tool_result"]
-            tool_id = tool_result.get("toolUseId", "unknown")
-            self.current_tool_results[tool_id] = tool_result
-            print(f"[ReAct - OBSERVATION DIRECT] Status: {tool_result.get('status')}")
-            if "content" in tool_result:
-                print(f"[ReAct - OBSERVATION CONTENT] {tool_result['content']}")
-                
-        # Handle event with potential MCP tool information
-        elif event_type == "event":
-            # Check for MCP tool information in various locations
-            if "current_tool_use" in kwargs:
-                tool = kwargs["current_tool_use"]
-                tool_id = tool.get("toolUseId", "unknown")
-                self.current_tool_calls[tool_id] = tool
-                print(f"[ReAct - ACTION MCP] Tool: {tool.get('name')}, Input: {tool.get('input')}")
-                
-            # Check for tool information in content
-            elif "content" in kwargs:
-                content = kwargs["content"]
-                if isinstance(content, list):
-                    for item in content:
-                        if isinstance(item, dict):
-                            if "toolUse" in item:
-                                tool_use = item["toolUse"]
-                                tool_id = tool_use.get("toolUseId", "unknown")
-                                self.current_tool_calls[tool_id] = tool_use
-                                print(f"[ReAct - ACTION MCP] Tool: {tool_use.get('name')}, Input: {tool_use.get('input')}")
-                            elif "toolResult" in item:
-                                tool_result = item["toolResult"]
-                                tool_id = tool_result.get("toolUseId", "unknown")
-                                self.current_tool_results[tool_id] = tool_result
-                                print(f"[ReAct - OBSERVATION MCP] Tool: {tool_id}, Status: {tool_result.get('status')}")
-                                if "content" in tool_result:
-                                    print(f"[ReAct - OBSERVATION CONTENT] {tool_result['content']}")
+            # Extract text from content blocks; one set operation picks each block's kind
+            if isinstance(content, list):
+                for block in content:
+                    if not isinstance(block, dict):
+                        continue
+                    present = _BLOCK_KINDS.intersection(block)
+                    if present:
+                        kind = next(iter(present))
+                        _BLOCK_HANDLERS[kind](block[kind], self, text_parts)
+            full_text = "".join(text_parts)
             
-            # For debugging - print full event data for unhandled events
-            # Uncomment this for debugging if needed
-            # else:
-            #     print(f"[DEBUG] Unhandled event data: {kwargs}")
+            # Print the complete message if it's not empty
+            if full_text:
+                logger.debug("[COMPLETE MESSAGE]\n%s", full_text)
+                
+            # Also print any buffered delta content if it wasn't part of a message
+            if self.delta_buffer:
+                logger.debug("[COMPLETE DELTA CONTENT]\n%s", ''.join(self.delta_buffer))
+                self.delta_buffer = []  # Reset buffer
         
-        # Continue with the original handler logic for UI updates
-        if "init_event_loop" in kwargs:
-            self._handle_initialization()
+        # Handle final message - ensure thinking content remains visible
+        if not self.thinking_preserved:
+            self._preserve_thinking_content()
+    
+    def _on_tool_use(self, tool_use, kwargs):
+        """Record a direct tool use event and show it."""
+        tool_id = tool_use.get("toolUseId", "unknown")
+        self._track_tool_call(tool_id, tool_use)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[ReAct - ACTION DIRECT] Tool: %s, Input: %s", tool_use.get('name'), tool_use.get('input'))
+        self._flush_before_tool()
+        self._handle_tool_use(tool_use)
+    
+    def _on_tool_result(self, tool_result, kwargs):
+        """Record a direct tool result event and show it."""
+        tool_id = tool_result.get("toolUseId", "unknown")
+        self._track_tool_result(tool_id, tool_result)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[ReAct - OBSERVATION DIRECT] Status: %s", tool_result.get('status'))
+            if "content" in tool_result:
+                logger.debug("[ReAct - OBSERVATION CONTENT] %s", tool_result['content'])
+        self._flush_before_tool()
+        self._handle_tool_result(tool_result)
+    
+    def _on_event(self, event, kwargs):
+        """Record MCP tool information carried by a raw event."""
+        if not logger.isEnabledFor(logging.DEBUG):
             return
         
-        # Handle thinking events - now handling reasoningText and reasoning_signature
-        if "reasoningText" in kwargs:
-            # This is the thinking content we need to capture
-            self._handle_thinking_content(kwargs["reasoningText"])
-            return
-            
-        if "reasoning_signature" in kwargs:
-            # This marks the end of the thinking process
-            self._handle_thinking_end()
-            return
-            
-        # Original thinking events (keeping for backward compatibility)
-        if "thinking_start" in kwargs:
-            self._handle_thinking_start()
-            return
+        # Check for MCP tool information in various locations
+        if "current_tool_use" in kwargs:
+            tool = kwargs["current_tool_use"]
+            tool_id = tool.get("toolUseId", "unknown")
+            self._track_tool_call(tool_id, tool)
+            logger.debug("[ReAct - ACTION MCP] Tool: %s, Input: %s", tool.get('name'), tool.get('input'))
             
-        if "thinking" in kwargs:
-            self._handle_thinking(kwargs["thinking"])
+        # Check for tool information in content
+        elif "content" in kwargs:
+            content = kwargs["content"]
+            if isinstance(content, list):
+                for item in content:
+                    if isinstance(item, dict):
+                        if "toolUse" in item:
+                            tool_use = item["toolUse"]
+                            tool_id = tool_use.get("toolUseId", "unknown")
+                            self._track_tool_call(tool_id, tool_use)
+                            logger.debug("[ReAct - ACTION MCP] Tool: %s, Input: %s", tool_use.get('name'), tool_use.get('input'))
+                        elif "toolResult" in item:
+                            tool_result = item["toolResult"]
+                            tool_id = tool_result.get("toolUseId", "unknown")
+                            self._track_tool_result(tool_id, tool_result)
+                            logger.debug("[ReAct - OBSERVATION MCP] Tool: %s, Status: %s", tool_id, tool_result.get('status'))
+                            if "content" in tool_result:
+                                logger.debug("[ReAct - OBSERVATION CONTENT] %s", tool_result['content'])
+    
+    def _track_tool_call(self, tool_id, tool_use):
+        """Remember a tool call until its result arrives."""
+        if self.current_tool_results.pop(tool_id, None) is not None:
+            # Pair complete and already rendered; nothing left to keep
+            self.current_tool_calls.pop(tool_id, None)
             return
-            
-        if "thinking_end" in kwargs:
-            self._handle_thinking_end()
+        self._remember_tool(self.current_tool_calls, tool_id, tool_use)
+    
+    def _track_tool_result(self, tool_id, tool_result):
+        """Remember a tool result until its call arrives."""
+        if self.current_tool_calls.pop(tool_id, None) is not None:
+            self.current_tool_results.pop(tool_id, None)
             return
-            
-        # Handle text streaming (both content_block_delta and data paths)
-        self._handle_text_streaming(kwargs)
-        
-        # Handle tool events
-        self._handle_tool_events(kwargs)
-        
-        # Handle final message - ensure thinking content remains visible
-        if "message" in kwargs and not self.thinking_preserved:
-            # Make sure thinking content is preserved
-            self._preserve_thinking_content()
+        self._remember_tool(self.current_tool_results, tool_id, tool_result)
+    
+    @staticmethod
+    def _remember_tool(tracked, tool_id, entry):
+        """Store entry as the newest one, evicting the oldest past the cap."""
+        tracked[tool_id] = entry
+        tracked.move_to_end(tool_id)
+        if len(tracked) > _MAX_TRACKED_TOOLS:
+            tracked.popitem(last=False)
     
     def _handle_initialization(self):
         """Reset state and show thinking indicator."""
         self.message_container = ""
         self.thinking_container = ""
         self.is_thinking = False
-        self.last_update_time = time.time()
+        self._mark_rendered()
+        self._reset_message_area()
+        self.settled_chars = 0
+        self.settled_fences = 0
         self.placeholder.markdown("_Thinking..._")
         # Reset thinking placeholder
         self.thinking_placeholder = None
@@ -234,15 +413,16 @@ class StreamlitHandler:
         """Handle the start of a thinking event."""
         self.is_thinking = True
         self.thinking_container = ""
+        # The expander replaces whatever the placeholder was showing
+        self._reset_message_area()
         # Create a thinking expander with a distinctive style
         with self.placeholder.expander("💭 Model Thinking Process", expanded=True):
             self.thinking_placeholder = st.empty()
             # Use a distinctive style for thinking content
-            self.thinking_placeholder.markdown("""
-            <div style="background-color: rgba(67, 97, 238, 0.1); padding: 10px; border-left: 4px solid #4361ee; border-radius: 4px; color: var(--text-color, currentColor);">
-            <em>Starting to think...</em>
-            </div>
-            """, unsafe_allow_html=True)
+            self.thinking_placeholder.markdown(
+                _THINK_WRAP_OPEN + "<em>Starting to think...</em>" + _THINK_WRAP_CLOSE,
+                unsafe_allow_html=True
+            )
     
     def _handle_thinking_content(self, reasoning_text):
         """
@@ -252,32 +432,30 @@ class StreamlitHandler:
             reasoning_text: Reasoning text from the agent
         """
         # Initialize thinking container if this is the first thinking content
-        if not self.thinking_container:
+        # (checking the part list avoids joining the text on every token)
+        if not self._thinking_parts:
             self._handle_thinking_start()
         
         # Extract text from the reasoning text
-        if isinstance(reasoning_text, dict) and "text" in reasoning_text:
-            thinking_text = reasoning_text["text"]
-        elif isinstance(reasoning_text, str):
+        if isinstance(reasoning_text, str):
             thinking_text = reasoning_text
+        elif isinstance(reasoning_text, dict) and "text" in reasoning_text:
+            thinking_text = reasoning_text["text"]
         else:
             # Debug the structure if it's not what we expect
-            logger.debug(f"Unexpected reasoningText structure: {reasoning_text}")
+            logger.debug("Unexpected reasoningText structure: %s", reasoning_text)
             thinking_text = str(reasoning_text)
         
         # Add the thinking text to our container
-        self.thinking_container += thinking_text
+        self._thinking_parts.append(thinking_text)
         
         # Update the thinking placeholder
-        current_time = time.time()
-        if current_time - self.last_update_time > self.update_interval:
+        if self._update_due(len(thinking_text)):
             if self.thinking_placeholder:
-                self.thinking_placeholder.markdown(f"""
-                <div style="background-color: rgba(67, 97, 238, 0.1); padding: 10px; border-left: 4px solid #4361ee; border-radius: 4px; color: var(--text-color, currentColor);">
-                {self.thinking_container}
-                </div>
-                """, unsafe_allow_html=True)
-            self.last_update_time = current_time
+                self.thinking_placeholder.markdown(
+                    _THINK_WRAP_OPEN + self.thinking_container + _THINK_WRAP_CLOSE,
+                    unsafe_allow_html=True
+                )
     
     def _handle_thinking(self, thinking_data):
         """
@@ -306,16 +484,14 @@ class StreamlitHandler:
         if thinking_text:
             # Add formatting to clearly distinguish thinking content
             formatted_thinking = f"💭 {thinking_text}"
-            self.thinking_container += formatted_thinking
+            self._thinking_parts.append(formatted_thinking)
             # Also store in session state for persistence
             st.session_state.thinking_content = self.thinking_container
             
             # Update the thinking placeholder
-            current_time = time.time()
-            if current_time - self.last_update_time > self.update_interval:
+            if self._update_due(len(formatted_thinking)):
                 if self.thinking_placeholder:
                     self.thinking_placeholder.markdown(self.thinking_container)
-                self.last_update_time = current_time
     
     def _handle_thinking_end(self):
         """Handle the end of a thinking event."""
@@ -323,12 +499,10 @@ class StreamlitHandler:
         # Ensure the final thinking content is displayed with styling
         if self.thinking_container and self.thinking_placeholder:
             # Keep the original thinking placeholder updated
-            self.thinking_placeholder.markdown(f"""
-            <div style="background-color: rgba(67, 97, 238, 0.1); padding: 10px; border-left: 4px solid #4361ee; border-radius: 4px; color: var(--text-color, currentColor);">
-            {self.thinking_container}
-            </div>
-            <p style="color: var(--text-color, currentColor);"><em>End of thinking process</em></p>
-            """, unsafe_allow_html=True)
+            self.thinking_placeholder.markdown(
+                _THINK_WRAP_OPEN + self.thinking_container + _THINK_WRAP_CLOSE + _THINK_END_FOOTER,
+                unsafe_allow_html=True
+            )
             
             # Preserve the thinking content in a permanent location
             self._preserve_thinking_content()
@@ -343,72 +517,52 @@ class StreamlitHandler:
             if len(st.session_state.messages) > 0:  # Make sure there's a message to associate with
                 question_idx = len(st.session_state.messages) - 1
                 # Store the thinking content with the question index
-                st.session_state.thinking_history.append({
+                thinking_item = {
                     "question_idx": question_idx,
                     "content": self.thinking_container
-                })
+                }
+                st.session_state.setdefault("thinking_history", []).append(thinking_item)
+                # Keep the first entry per question, matching the history render order
+                st.session_state.setdefault("thinking_by_qidx", {}).setdefault(question_idx, thinking_item)
                 
             # Create a permanent container for the thinking content
             # This will be displayed below the response
             thinking_container = st.container()
             with thinking_container:
                 st.markdown("### 💭 Thinking Process")
-                st.markdown(f"""
-                <div style="background-color: rgba(67, 97, 238, 0.1); padding: 10px; border-left: 4px solid #4361ee; border-radius: 4px; color: var(--text-color, currentColor);">
-                {self.thinking_container}
-                </div>
-                <p style="color: var(--text-color, currentColor);"><em>End of thinking process</em></p>
-                """, unsafe_allow_html=True)
-    
-    def _handle_text_streaming(self, kwargs):
+                st.markdown(
+                    _THINK_WRAP_OPEN + self.thinking_container + _THINK_WRAP_CLOSE + _THINK_END_FOOTER,
+                    unsafe_allow_html=True
+                )
+    
+    def _handle_text_streaming(self, text_chunk):
         """
-        Extract and display streaming text from various event formats.
+        Append streamed text and display it.
         
         Args:
-            kwargs: Event data from the agent
+            text_chunk: Text extracted from a content_block_delta or data event
         """
-        text_chunk = None
-        
-        # Extract text from content_block_delta format
-        if "content_block_delta" in kwargs:
-            delta = kwargs["content_block_delta"]
-            if "delta" in delta and "text" in delta["delta"]:
-                text_chunk = delta["delta"]["text"]
-        
-        # Extract text from data format
-        elif "data" in kwargs:
-            data = kwargs["data"]
-            if isinstance(data, str):
-                text_chunk = data
-            elif isinstance(data, dict) and "delta" in data:
-                delta = data["delta"]
-                if isinstance(delta, dict) and "text" in delta:
-                    text_chunk = delta["text"]
-        
-        # Update UI if we found text
         if text_chunk:
-            self.message_container += text_chunk
-            self._update_ui_if_needed()
+            self._message_parts.append(text_chunk)
+            self._ui_flush(len(text_chunk))
     
-    def _handle_tool_events(self, kwargs):
+    def _flush_before_tool(self):
+        """Force update any accumulated text before tool output is shown."""
+        if self.message_container:
+            self._render_message()
+    
+    def _tool_slots(self, tool_id):
         """
-        Handle tool use and tool result events.
+        Return the info/json/result placeholders for a tool, creating them on first use.
         
-        Args:
-            kwargs: Event data from the agent
+        Each slot is a single st.empty(), so later updates for the same tool
+        replace its elements instead of adding new ones.
         """
-        # Force update any accumulated text first
-        if any(k in kwargs for k in ["tool_use", "tool_result", "content_block_start"]):
-            if self.message_container:
-                self.placeholder.markdown(self.message_container)
-            
-            # Handle tool use
-            if "tool_use" in kwargs:
-                self._handle_tool_use(kwargs["tool_use"])
-            
-            # Handle tool results
-            if "tool_result" in kwargs:
-                self._handle_tool_result(kwargs["tool_result"])
+        slots = self.tool_containers.get(tool_id)
+        if slots is None:
+            slots = {"info": st.empty(), "json": st.empty(), "result": st.empty()}
+            self.tool_containers[tool_id] = slots
+        return slots
     
     def _handle_tool_use(self, tool_use):
         """
@@ -420,14 +574,10 @@ class StreamlitHandler:
         tool_id = tool_use["toolUseId"]
         tool_name = tool_use["name"]
         
-        # Create a container for this tool
-        tool_container = st.container()
-        self.tool_containers[tool_id] = tool_container
-        
-        # Show tool execution in UI
-        with tool_container:
-            st.info(f"🔧 Using tool: **{tool_name}**")
-            st.json(tool_use.get("input", {}))
+        # Show tool execution in UI, rewriting this tool's slots in place
+        slots = self._tool_slots(tool_id)
+        slots["info"].info(f"🔧 Using tool: **{tool_name}**")
+        slots["json"].json(tool_use.get("input", {}))
     
     def _handle_tool_result(self, tool_result):
         """
@@ -438,11 +588,13 @@ class StreamlitHandler:
         """
         tool_id = tool_result["toolUseId"]
         
-        # Get the container for this tool or create a new one
-        tool_container = self.tool_containers.get(tool_id, st.container())
+        # Render each result once, even if its event is delivered again
+        if tool_id in self.rendered_tool_results:
+            return
+        self.rendered_tool_results.add(tool_id)
         
-        # Show tool result in UI
-        with tool_container:
+        # Show tool result in UI, replacing anything already in the result slot
+        with self._tool_slots(tool_id)["result"].container():
             if tool_result["status"] == "success":
                 st.success(f"✅ Tool completed successfully")
             else:
@@ -462,15 +614,171 @@ class StreamlitHandler:
         Args:
             json_data: JSON data to visualize
         """
-        if isinstance(json_data, dict) and "labels" in json_data and "values" in json_data:
-            chart_data = {"x": json_data["labels"], "y": json_data["values"]}
+        chart_data = _prep_chart(json_data)
+        if chart_data is not None:
             st.bar_chart(chart_data)
         else:
             st.json(json_data)
     
-    def _update_ui_if_needed(self):
-        """Update the UI if enough time has passed since the last update."""
-        current_time = time.time()
-        if current_time - self.last_update_time > self.update_interval:
-            self.placeholder.markdown(self.message_container)
-            self.last_update_time = current_time
+    def _update_due(self, new_chars):
+        """
+        Record newly received characters and decide whether to redraw.
+        
+        Updates are driven by token arrival: redraw once flush_chars characters
+        have accumulated, or when buffered text has waited update_interval.
+        Redraws are never closer together than min_render_interval; flush()
+        draws whatever remains. Both limits are kept as absolute monotonic
+        deadlines, so each event costs one clock read and two comparisons.
+        
+        Args:
+            new_chars: Number of characters just appended
+            
+        Returns:
+            bool: True if the UI should be updated now
+        """
+        self.pending_chars += new_chars
+        current_time = time.monotonic()
+        if current_time < self._render_not_before:
+            return False
+        if self.pending_chars >= self.flush_chars or current_time > self._flush_deadline:
+            self._mark_rendered(current_time)
+            return True
+        return False
+    
+    def _mark_rendered(self, current_time=None):
+        """Clear the pending count and move both redraw deadlines past current_time."""
+        if current_time is None:
+            current_time = time.monotonic()
+        self.pending_chars = 0
+        self._render_not_before = current_time + self.min_render_interval
+        self._flush_deadline = current_time + self.update_interval
+    
+    def _update_ui_if_needed(self, new_chars=0):
+        """
+        Update the UI if enough text has accumulated since the last update.
+        
+        Args:
+            new_chars: Number of characters just appended to the message
+        """
+        if self._update_due(new_chars):
+            self._render_message()
+    
+    def _reset_message_area(self):
+        """Forget the rendered message elements after the placeholder's content is replaced."""
+        self.message_area = None
+        self.live_placeholder = None
+    
+    def _render_message(self):
+        """
+        Render the streamed message, redrawing only the unfinished paragraph.
+        
+        Each completed paragraph is written once into its own element, so an
+        update re-parses the latest paragraph instead of the whole response.
+        A blank line inside an open code fence does not end a paragraph.
+        """
+        text = self.message_container
+        if self.message_area is None:
+            self.message_area = self.placeholder.container()
+            if self.settled_chars:
+                self.message_area.markdown(text[:self.settled_chars])
+            self.live_placeholder = self.message_area.empty()
+        
+        tail = text[self.settled_chars:]
+        cut = tail.rfind("\n\n")
+        if cut != -1:
+            head = tail[:cut]
+            fences = self.settled_fences + head.count("```")
+            if fences % 2 == 0:
+                # Freeze the finished paragraphs and start a new element for the rest
+                self.live_placeholder.markdown(head)
+                self.live_placeholder = self.message_area.empty()
+                self.settled_chars += cut + 2
+                self.settled_fences = fences
+                tail = tail[cut + 2:]
+        
+        self.live_placeholder.markdown(tail)
+    
+    def flush(self):
+        """Draw any buffered text that has not been rendered yet."""
+        if self.message_container:
+            self._render_message()
+        self._mark_rendered()
+    
+    def enqueue(self, **kwargs):
+        """
+        Agent callback used by run_agent: hand the event to the rendering thread.
+        
+        Raises once rendering has stopped, which aborts the agent turn the same
+        way an exception from a synchronous callback handler would.
+        """
+        if self._stopped:
+            raise RuntimeError("Streaming display was stopped")
+        self._queue.put_nowait(kwargs)
+    
+    def run_agent(self, agent, prompt):
+        """
+        Run agent(prompt) on a worker thread and render its events on this one.
+        
+        The agent only enqueues events, so model and tool progress never waits
+        on UI writes. Events that pile up while a redraw is in progress are
+        drained together, with runs of text deltas merged into one event. While
+        the queue is idle, buffered text is flushed once it has waited
+        update_interval.
+        
+        Args:
+            agent: Strands agent to invoke
+            prompt: Input for the agent
+            
+        Returns:
+            The agent's result
+        """
+        events = self._queue = queue.SimpleQueue()
+        self._stopped = False
+        outcome = {}
+        
+        def run():
+            try:
+                outcome["result"] = agent(prompt)
+            except BaseException as e:
+                outcome["error"] = e
+            finally:
+                events.put(_STREAM_DONE)
+        
+        previous_handler = agent.callback_handler
+        agent.callback_handler = self.enqueue
+        worker = threading.Thread(target=run, name="agent-turn", daemon=True)
+        worker.start()
+        try:
+            while True:
+                try:
+                    event = events.get(timeout=self.update_interval)
+                except queue.Empty:
+                    if self.pending_chars and self._update_due(0):
+                        self._render_message()
+                    continue
+                
+                # Drain whatever else is already waiting so a backlog is rendered once
+                batch = [event]
+                while True:
+                    try:
+                        batch.append(events.get_nowait())
+                    except queue.Empty:
+                        break
+                
+                stream_done = False
+                for event in _coalesce_events(batch):
+                    if event is _STREAM_DONE:
+                        stream_done = True
+                        break
+                    self(**event)
+                if stream_done:
+                    break
+        finally:
+            # If rendering failed or the script was stopped, make the agent bail out too
+            self._stopped = True
+            worker.join()
+            agent.callback_handler = previous_handler
+        
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["result"]
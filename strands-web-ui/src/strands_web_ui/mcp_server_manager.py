@@ -7,14 +7,43 @@ This module provides a manager class for MCP servers that can be used with Stran
 import json
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from typing import Dict, List, Optional, Any
 
-from mcp import StdioServerParameters
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+from mcp import StdioServerParameters, stdio_client
 from strands.tools.mcp import MCPClient
 from strands.types.tools import AgentTool
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on concurrent list_tools RPCs
+MAX_PARALLEL_RPCS = 8
+
+@lru_cache(maxsize=4)
+def _read_cached(config_path: str, mtime_ns: int, size: int) -> bytes:
+    """
+    Read a config file, reusing the contents while its mtime and size are unchanged.
+    
+    Only the raw bytes are cached, so every load parses its own dictionary.
+    """
+    with open(config_path, 'rb') as f:
+        return f.read()
+
+def _read_config(config_path: str) -> Dict[str, Any]:
+    """Parse a JSON config file into a fresh dictionary, with orjson when it is installed."""
+    stat = os.stat(config_path)
+    data = _read_cached(config_path, stat.st_mtime_ns, stat.st_size)
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
 class MCPServerManager:
     """
     Manages MCP server connections and tools.
@@ -26,10 +55,23 @@ class MCPServerManager:
     - Managing server status
     """
     
+    __slots__ = ("servers", "active_servers", "_per_server_tools", "_tools_cache")
+    
     def __init__(self):
         """Initialize the MCP server manager."""
         self.servers = {}
         self.active_servers = {}
+        # list_tools is an RPC per server, so results are kept until the server set changes
+        self._per_server_tools: Dict[str, List[AgentTool]] = {}
+        self._tools_cache: Optional[List[AgentTool]] = None
+    
+    def _invalidate_tools(self, server_id: Optional[str] = None) -> None:
+        """Drop cached tools for one server, or for all servers if server_id is None."""
+        if server_id is None:
+            self._per_server_tools.clear()
+        else:
+            self._per_server_tools.pop(server_id, None)
+        self._tools_cache = None
     
     def load_config(self, config_path: str) -> bool:
         """
@@ -46,8 +88,7 @@ class MCPServerManager:
                 logger.error(f"Config file not found: {config_path}")
                 return False
                 
-            with open(config_path, 'r') as f:
-                config = json.load(f)
+            config = _read_config(config_path)
             
             if 'mcpServers' not in config:
                 logger.error("Invalid config format: 'mcpServers' key not found")
@@ -55,6 +96,7 @@ class MCPServerManager:
             
             # Clear existing servers
             self.servers = {}
+            self._invalidate_tools()
             
             # Load server configurations
             for server_id, server_config in config['mcpServers'].items():
@@ -118,7 +160,6 @@ class MCPServerManager:
                 )
                 
                 # Create an MCP client with stdio transport
-                from mcp import stdio_client
                 server = MCPClient(lambda: stdio_client(params))
                 
                 # Start the server
@@ -127,6 +168,7 @@ class MCPServerManager:
                 # Store the active server
                 self.active_servers[server_id] = server
                 self.servers[server_id]['server'] = server
+                self._invalidate_tools(server_id)
                 
                 logger.info(f"Connected to server: {server_id}")
                 return True
@@ -156,6 +198,7 @@ class MCPServerManager:
             server.stop(None, None, None)
             del self.active_servers[server_id]
             self.servers[server_id]['server'] = None
+            self._invalidate_tools(server_id)
             logger.info(f"Disconnected from server: {server_id}")
             return True
         except Exception as e:
@@ -166,6 +209,9 @@ class MCPServerManager:
         """
         Get tools from an MCP server.
         
+        Successful results are cached until the server is disconnected or the
+        configuration is reloaded.
+        
         Args:
             server_id: Identifier of the server to get tools from
             
@@ -176,33 +222,83 @@ class MCPServerManager:
             logger.error(f"Server {server_id} not active")
             return []
         
+        tools = self._per_server_tools.get(server_id)
+        if tools is not None:
+            return tools
+        
         try:
             server = self.active_servers[server_id]
             tools = server.list_tools_sync()
             logger.info(f"Retrieved {len(tools)} tools from server: {server_id}")
+            self._per_server_tools[server_id] = tools
             return tools
         except Exception as e:
             logger.error(f"Failed to get tools from server {server_id}: {str(e)}")
             return []
     
+    def get_tools_by_server(self, server_ids: Optional[List[str]] = None) -> Dict[str, List[AgentTool]]:
+        """
+        Get tools from several MCP servers, querying uncached servers concurrently.
+        
+        Args:
+            server_ids: Servers to query (default: all active servers)
+            
+        Returns:
+            Dict[str, List[AgentTool]]: Tools per server, in the order of server_ids
+        """
+        if server_ids is None:
+            server_ids = list(self.active_servers)
+        
+        tools = {server_id: self._per_server_tools[server_id]
+                 for server_id in server_ids if server_id in self._per_server_tools}
+        pending = [server_id for server_id in server_ids if server_id not in tools]
+        if len(pending) == 1:
+            tools[pending[0]] = self.get_tools(pending[0])
+        elif pending:
+            # Each list_tools call is a blocking round-trip to its server process
+            with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_RPCS, len(pending))) as executor:
+                futures = {executor.submit(self.get_tools, server_id): server_id for server_id in pending}
+                for future in as_completed(futures):
+                    server_id = futures[future]
+                    try:
+                        tools[server_id] = future.result()
+                    except Exception as e:
+                        logger.error(f"Failed to get tools from server {server_id}: {str(e)}")
+                        tools[server_id] = []
+        
+        return {server_id: tools[server_id] for server_id in server_ids}
+    
     def get_all_tools(self) -> List[AgentTool]:
         """
         Get tools from all active MCP servers.
         
+        The combined list is cached until a server connects or disconnects or
+        the configuration is reloaded; callers should not mutate it.
+        
         Returns:
             List[AgentTool]: Combined list of tools from all active servers
         """
+        if self._tools_cache is not None:
+            return self._tools_cache
+        
         all_tools = []
-        for server_id in self.active_servers:
-            all_tools.extend(self.get_tools(server_id))
+        for server_tools in self.get_tools_by_server().values():
+            all_tools.extend(server_tools)
         
         logger.info(f"Retrieved {len(all_tools)} tools from all active servers")
+        # Only a complete result is cached, so a failed server is retried next time
+        if all(server_id in self._per_server_tools for server_id in self.active_servers):
+            self._tools_cache = all_tools
         return all_tools
     
     def disconnect_all(self) -> None:
-        """Disconnect from all active MCP servers."""
-        for server_id in list(self.active_servers.keys()):
-            self.disconnect_server(server_id)
+        """Disconnect from all active MCP servers, stopping them concurrently."""
+        server_ids = list(self.active_servers.keys())
+        if server_ids:
+            # Each stop can block on process teardown; they are independent
+            with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_RPCS, len(server_ids))) as executor:
+                list(executor.map(self.disconnect_server, server_ids))
+        self._invalidate_tools()
         
         logger.info("Disconnected from all servers")
     
@@ -2,10 +2,65 @@
 Configuration loader for the Strands Web UI.
 """
 
+import copy
 import json
 import os
+from functools import lru_cache
 from typing import Dict, Any
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Returned (as a copy) when the config file is missing or unreadable
+_DEFAULT_CONFIG: Dict[str, Any] = {
+    "model": {
+        "provider": "bedrock",
+        "model_id": "us.anthropic.claude-3-7-sonnet-20250219-v1:0",
+        "region": "us-east-1",
+        "max_tokens": 24000
+    },
+    "agent": {
+        "system_prompt": "You are a helpful assistant that provides concise, accurate information.",
+        "max_parallel_tools": 4,
+        "record_direct_tool_call": True,
+        "hot_reload_tools": True,
+        "enable_native_thinking": True,
+        "thinking_budget": 16000
+    },
+    "conversation": {
+        "window_size": 20,
+        "summarize_overflow": True
+    },
+    "ui": {
+        "update_interval": 0.1,
+        "flush_chars": 24
+    }
+}
+
+_DEFAULT_MCP_CONFIG: Dict[str, Any] = {"mcpServers": {}}
+
+
+@lru_cache(maxsize=8)
+def _read_cached(config_path: str, mtime_ns: int, size: int) -> bytes:
+    """
+    Read a config file, reusing the contents while its mtime and size are unchanged.
+    
+    Only the raw bytes are cached, so every caller parses its own dictionary
+    and may mutate it freely.
+    """
+    with open(config_path, "rb") as f:
+        return f.read()
+
+
+def _parse_json(data: bytes) -> Dict[str, Any]:
+    """Parse JSON bytes with orjson when it is installed, else the json module."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
 
 def load_config(config_path: str = None) -> Dict[str, Any]:
     """
@@ -23,35 +78,13 @@ def load_config(config_path: str = None) -> Dict[str, Any]:
     
     try:
         if config_path and os.path.exists(config_path):
-            with open(config_path, "r") as f:
-                return json.load(f)
+            stat = os.stat(config_path)
+            return _parse_json(_read_cached(config_path, stat.st_mtime_ns, stat.st_size))
     except Exception as e:
         print(f"Error loading config from {config_path}: {e}")
     
     # Return default config if file not found or error occurred
-    return {
-        "model": {
-            "provider": "bedrock",
-            "model_id": "us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-            "region": "us-east-1",
-            "max_tokens": 24000
-        },
-        "agent": {
-            "system_prompt": "You are a helpful assistant that provides concise, accurate information.",
-            "max_parallel_tools": 4,
-            "record_direct_tool_call": True,
-            "hot_reload_tools": True,
-            "enable_native_thinking": True,
-            "thinking_budget": 16000
-        },
-        "conversation": {
-            "window_size": 20,
-            "summarize_overflow": True
-        },
-        "ui": {
-            "update_interval": 0.1
-        }
-    }
+    return copy.deepcopy(_DEFAULT_CONFIG)
 
 
 def load_mcp_config(config_path: str = None) -> Dict[str, Any]:
@@ -70,10 +103,10 @@ def load_mcp_config(config_path: str = None) -> Dict[str, Any]:
     
     try:
         if config_path and os.path.exists(config_path):
-            with open(config_path, "r") as f:
-                return json.load(f)
+            stat = os.stat(config_path)
+            return _parse_json(_read_cached(config_path, stat.st_mtime_ns, stat.st_size))
     except Exception as e:
         print(f"Error loading MCP config from {config_path}: {e}")
     
     # Return empty config if file not found or error occurred
-    return {"mcpServers": {}}
+    return copy.deepcopy(_DEFAULT_MCP_CONFIG)
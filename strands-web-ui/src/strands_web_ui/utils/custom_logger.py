@@ -7,10 +7,128 @@ interactive prompts visible in the console.
 """
 
 import sys
-import re
 import os
 import time
-from typing import TextIO, Optional, Dict, Set
+import queue
+import atexit
+import threading
+from collections import OrderedDict
+from typing import TextIO, Optional, Set, List
+
+# 日志文件以原始文件描述符打开，跳过 TextIOWrapper 的编码层
+LOG_FILE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_APPEND | getattr(os, "O_CLOEXEC", 0)
+
+# 每批写入的上限
+LOG_BATCH_MAX_ITEMS = 256
+LOG_BATCH_MAX_BYTES = 1 << 20
+
+
+def open_log_fd(path: str) -> int:
+    """
+    Open a log file for raw, append-only byte writes.
+    
+    The file is truncated so each session starts with a clean log.
+    
+    Args:
+        path: Path to the log file
+        
+    Returns:
+        int: The open file descriptor
+    """
+    return os.open(path, LOG_FILE_FLAGS, 0o644)
+
+
+class BackgroundLogWriter:
+    """
+    Writes log text to a file from a background thread.
+    
+    Writes are pushed onto a queue as-is, then drained in batches by a daemon
+    thread, so callers never block on encoding or file I/O. Each batch is
+    joined, encoded once and written with os.write on the raw file descriptor.
+    """
+    
+    def __init__(self, log_fd: int, max_batch_items: int = LOG_BATCH_MAX_ITEMS,
+                 max_batch_bytes: int = LOG_BATCH_MAX_BYTES):
+        """
+        Initialize the background log writer.
+        
+        Args:
+            log_fd: The file descriptor to write logs to (see open_log_fd)
+            max_batch_items: Maximum number of writes to combine into one batch
+            max_batch_bytes: Approximate maximum size of one batch (counted in characters)
+        """
+        self.fd = log_fd
+        self.max_batch_items = max_batch_items
+        self.max_batch_bytes = max_batch_bytes
+        self._queue: "queue.SimpleQueue[Optional[str]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+    
+    def write(self, text: str) -> None:
+        """
+        Queue text to be written to the log file.
+        
+        Args:
+            text: The text to write
+        """
+        self._queue.put(text)
+    
+    def close(self, timeout: float = 1.0) -> None:
+        """
+        Drain pending writes and stop the background thread.
+        
+        Args:
+            timeout: Maximum time to wait for the thread to finish (seconds)
+        """
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+    
+    def _run(self) -> None:
+        """Drain the queue in batches until a stop sentinel is received."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            
+            batch: List[str] = [item]
+            size = len(item)
+            stop = False
+            
+            # 把已经排队的写入合并成一个批次
+            while len(batch) < self.max_batch_items and size < self.max_batch_bytes:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+                size += len(item)
+            
+            self._write_batch(batch)
+            if stop:
+                return
+    
+    def _write_batch(self, batch: List[str]) -> None:
+        """
+        Write one batch to the log file descriptor.
+        
+        Args:
+            batch: The pending writes
+        """
+        try:
+            # 整个批次只编码一次，调用方线程不承担编码开销
+            data = memoryview("".join(batch).encode("utf-8", "replace"))
+            
+            # 写入可能不完整，循环直到写完
+            while data:
+                written = os.write(self.fd, data)
+                data = data[written:]
+        except OSError:
+            pass
+
 
 class FilteredOutputStream:
     """
@@ -21,50 +139,53 @@ class FilteredOutputStream:
     - Interactive prompts and user-facing messages to remain visible in the console
     """
     
-    def __init__(self, log_file: TextIO, original_stream: TextIO, is_stderr: bool = False):
+    def __init__(self, log_fd: int, original_stream: TextIO, is_stderr: bool = False):
         """
         Initialize the filtered output stream.
         
         Args:
-            log_file: The file object to write logs to
+            log_fd: The file descriptor to write logs to
             original_stream: The original stream (sys.stdout or sys.stderr)
             is_stderr: Whether this is for stderr (True) or stdout (False)
         """
-        self.log_file = log_file
+        self.log_writer = BackgroundLogWriter(log_fd)
         self.original_stream = original_stream
         self.is_stderr = is_stderr
         
-        # Patterns that indicate event logs (should go to file only)
-        self.event_patterns = [
-            r'\[ReAct -',
-            r'\[COMPLETE MESSAGE\]',
-            r'\[COMPLETE DELTA CONTENT\]',
-            r'===== TOOL EXECUTION LOGS =====',
-            r'===== END TOOL EXECUTION LOGS =====',
-            r'Available tools on agent:',
-            r'Processing user input:',
-            r'Agent response type:',
-            r'Agent response:',
-            r'ERROR in agent execution:',
-            r'Error type:',
-            r'Calling agent with user input...',  # 添加这个模式以防止重复
-        ]
-        
-        # Patterns that indicate interactive prompts (should go to console)
-        self.interactive_patterns = [
-            r'Do you want to execute',
-            r'Are you sure you want to',
-            r'This command may be dangerous',
-            r'Please confirm',
-            r'Proceed with',
-            r'\[y/n\]',
-            r'Press Enter to continue',
-            r'Type "yes" to confirm',
-        ]
+        # Markers that indicate event logs (should go to file only).
+        # These are plain substrings, matched with `in` rather than regex.
+        self.event_patterns = (
+            '[ReAct -',
+            '[COMPLETE MESSAGE]',
+            '[COMPLETE DELTA CONTENT]',
+            '===== TOOL EXECUTION LOGS =====',
+            '===== END TOOL EXECUTION LOGS =====',
+            'Available tools on agent:',
+            'Processing user input:',
+            'Agent response type:',
+            'Agent response:',
+            'ERROR in agent execution:',
+            'Error type:',
+            'Calling agent with user input',  # 添加这个模式以防止重复
+        )
+        
+        # Markers that indicate interactive prompts (should go to console)
+        self.interactive_patterns = (
+            'Do you want to execute',
+            'Are you sure you want to',
+            'This command may be dangerous',
+            'Please confirm',
+            'Proceed with',
+            '[y/n]',
+            'Press Enter to continue',
+            'Type "yes" to confirm',
+        )
         
         # 防止重复日志的缓存
-        self.recent_logs: Dict[str, float] = {}
+        # 以日志文本的哈希为键，按最后出现时间排序，最早的在前面
+        self.recent_logs: "OrderedDict[int, float]" = OrderedDict()
         self.log_expiry_time = 1.0  # 1秒内相同的日志被视为重复
+        self._dedup_lock = threading.Lock()
         
     def write(self, text: str) -> None:
         """
@@ -73,47 +194,73 @@ class FilteredOutputStream:
         Args:
             text: The text to write
         """
-        # 检查是否是重复日志
-        if text.strip() and not self.is_stderr:
+        if not text:
+            return
+        
+        # 纯空白（如 print 单独写入的换行）不会是事件日志或交互式提示，直接透传
+        if text.isspace():
+            self.log_writer.write(text)
+            self.original_stream.write(text)
+            if self.is_stderr or "\n" in text:
+                self.original_stream.flush()
+            return
+        
+        # stderr 不去重，并且总是写入控制台，无需匹配事件日志或交互式提示
+        if self.is_stderr:
+            self.log_writer.write(text)
+            self.original_stream.write(text)
+            self.original_stream.flush()
+            return
+        
+        # 检查是否是重复日志；多个线程会同时写入，去重缓存需要加锁
+        with self._dedup_lock:
             current_time = time.time()
-            # 清理过期的日志记录
-            expired_logs = [log for log, timestamp in self.recent_logs.items() 
-                           if current_time - timestamp > self.log_expiry_time]
-            for log in expired_logs:
-                del self.recent_logs[log]
-                
-            # 检查是否是最近看到的相同日志
-            if text in self.recent_logs:
+            # 从最早的记录开始清理过期日志，遇到未过期的即停止
+            recent_logs = self.recent_logs
+            while recent_logs:
+                oldest = next(iter(recent_logs.values()))
+                if current_time - oldest <= self.log_expiry_time:
+                    break
+                recent_logs.popitem(last=False)
+            
+            # 检查是否是最近看到的相同日志（哈希碰撞的概率可以忽略）
+            key = hash(text)
+            if key in recent_logs:
                 # 这是一个重复日志，更新时间戳但不写入文件
-                self.recent_logs[text] = current_time
+                recent_logs.move_to_end(key)
+                recent_logs[key] = current_time
                 return
             
             # 记录这个新日志
-            self.recent_logs[text] = current_time
+            recent_logs[key] = current_time
         
-        # 写入日志文件
-        self.log_file.write(text)
-        self.log_file.flush()
+        # 写入日志文件（由后台线程批量写入）
+        self.log_writer.write(text)
         
         # 检查是否是事件日志
-        is_event_log = any(re.search(pattern, text) for pattern in self.event_patterns)
+        is_event_log = any(marker in text for marker in self.event_patterns)
         
         # 检查是否是交互式提示
-        is_interactive = any(re.search(pattern, text) for pattern in self.interactive_patterns)
+        is_interactive = any(marker in text for marker in self.interactive_patterns)
         
-        # 写入控制台条件:
+        # 写入控制台条件（stderr 已在上面处理）:
         # 1. 是交互式提示，或
-        # 2. 是stderr（确保错误可见），或
-        # 3. 不是事件日志
-        if is_interactive or self.is_stderr or not is_event_log:
+        # 2. 不是事件日志
+        if is_interactive or not is_event_log:
             self.original_stream.write(text)
-            self.original_stream.flush()
+            # 只在行尾或交互式提示时刷新控制台，避免 print 的每个片段都刷新
+            if is_interactive or "\n" in text:
+                self.original_stream.flush()
     
     def flush(self) -> None:
-        """Flush both output streams."""
-        self.log_file.flush()
+        """Flush the console stream; the log file is drained by the background writer."""
         self.original_stream.flush()
     
+    def close(self) -> None:
+        """Flush the console stream, drain pending log writes and stop the background writer."""
+        self.original_stream.flush()
+        self.log_writer.close()
+    
     def isatty(self) -> bool:
         """Return whether the original stream is connected to a terminal."""
         return self.original_stream.isatty()
@@ -132,22 +279,37 @@ def setup_filtered_output(stdout_path: str = 'logs/output.log',
         stdout_path: Path to the stdout log file
         stderr_path: Path to the stderr log file
     """
-    # 确保日志目录存在
-    os.makedirs(os.path.dirname(stdout_path), exist_ok=True)
+    # Streamlit 每次 rerun 都会再次执行入口脚本；已经设置过时不再重复包装
+    if isinstance(sys.stdout, FilteredOutputStream):
+        return
+    
+    # 确保日志目录存在（通常是单级目录，先直接 mkdir，缺少父目录时再递归创建）
+    log_dir = os.path.dirname(stdout_path)
+    if log_dir:
+        try:
+            os.mkdir(log_dir)
+        except FileExistsError:
+            pass
+        except FileNotFoundError:
+            os.makedirs(log_dir, exist_ok=True)
     
     # 保存原始流
     original_stdout = sys.stdout
     original_stderr = sys.stderr
     
-    # 打开日志文件，使用 'w' 模式清空旧内容
-    stdout_file = open(stdout_path, 'w')
-    stderr_file = open(stderr_path, 'w')
+    # 打开日志文件，清空旧内容
+    stdout_fd = open_log_fd(stdout_path)
+    stderr_fd = open_log_fd(stderr_path)
     
     # 写入会话开始标记
-    session_start = f"\n{'='*50}\nSession started at {time.strftime('%Y-%m-%d %H:%M:%S')}\n{'='*50}\n\n"
-    stdout_file.write(session_start)
-    stderr_file.write(session_start)
+    session_start = f"\n{'='*50}\nSession started at {time.strftime('%Y-%m-%d %H:%M:%S')}\n{'='*50}\n\n".encode()
+    os.write(stdout_fd, session_start)
+    os.write(stderr_fd, session_start)
     
     # 创建并设置过滤输出流
-    sys.stdout = FilteredOutputStream(stdout_file, original_stdout, is_stderr=False)
-    sys.stderr = FilteredOutputStream(stderr_file, original_stderr, is_stderr=True)
+    sys.stdout = FilteredOutputStream(stdout_fd, original_stdout, is_stderr=False)
+    sys.stderr = FilteredOutputStream(stderr_fd, original_stderr, is_stderr=True)
+    
+    # 退出时写完队列中剩余的日志
+    atexit.register(sys.stdout.close)
+    atexit.register(sys.stderr.close)
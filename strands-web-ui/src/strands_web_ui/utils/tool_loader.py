@@ -8,12 +8,89 @@ based on configuration settings, following the patterns from the agent-builder.
 import importlib
 import logging
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional, Callable
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Module-level helpers that are never tools themselves
+_SKIP_ATTR_NAMES = frozenset({'main', 'create_result_table', 'create_error_panel'})
+
+# Upper bound on tool modules imported concurrently
+MAX_IMPORT_WORKERS = 8
+
+# Resolved tool objects keyed by tool name; see clear_tool_cache
+_TOOL_RESOLUTION_CACHE: Dict[str, Any] = {}
+
+def clear_tool_cache() -> None:
+    """Forget resolved tools so the next load resolves them again."""
+    _TOOL_RESOLUTION_CACHE.clear()
+
+def _import_tool_module(tool_name: str) -> Any:
+    """
+    Import the strands_tools module of a tool.
+    
+    Args:
+        tool_name: Name of the tool (and of its strands_tools module)
+        
+    Returns:
+        The imported module, or the exception raised while importing it
+    """
+    module_name = f"strands_tools.{tool_name}"
+    logger.debug("Attempting to import %s", module_name)
+    try:
+        return importlib.import_module(module_name)
+    except Exception as e:
+        return e
+
+def _resolve_tool(tool_name: str, module: Any, strands_tool: Callable) -> Optional[Any]:
+    """
+    Find the tool provided by an imported strands_tools module.
+    
+    Args:
+        tool_name: Name of the tool (and of its strands_tools module)
+        module: The imported module
+        strands_tool: The strands @tool decorator, used to wrap plain functions
+        
+    Returns:
+        The tool object, or None if the module has no suitable function
+    """
+    module_name = module.__name__
+    
+    # First, look for a function with the same name as the module
+    if hasattr(module, tool_name):
+        tool_func = getattr(module, tool_name)
+        if callable(tool_func):
+            if hasattr(tool_func, 'TOOL_SPEC'):
+                logger.debug("Found tool '%s' in module %s", tool_name, module_name)
+                return tool_func
+            # Create a wrapper with the @tool decorator
+            logger.debug("Creating wrapper for tool '%s'", tool_name)
+            return strands_tool(tool_func)
+    
+    # If not found by name, look for any function with TOOL_SPEC attribute,
+    # remembering the first other callable as a fallback in the same pass
+    fallback_name = fallback = None
+    for attr_name, attr in vars(module).items():
+        if attr_name.startswith('_') or not callable(attr):
+            continue
+        if hasattr(attr, 'TOOL_SPEC'):
+            logger.debug("Found tool '%s' in module %s", attr_name, module_name)
+            return attr
+        if fallback is None and attr_name not in _SKIP_ATTR_NAMES:
+            fallback_name, fallback = attr_name, attr
+    
+    # If still not found, use the callable function that might be the tool
+    if fallback is not None:
+        # Create a wrapper with the @tool decorator
+        logger.debug("Creating wrapper for function '%s' in module %s", fallback_name, module_name)
+        return strands_tool(fallback)
+    
+    logger.warning(f"No suitable function found in module {module_name}")
+    return None
+
 def load_tools_from_config(config: Dict[str, Any]) -> List:
     """
     Load tools based on configuration.
@@ -35,6 +112,7 @@ def load_tools_from_config(config: Dict[str, Any]) -> List:
     
     # Load all available tools
     enabled_tools = []
+    loaded_by_name: Dict[str, Any] = {}
     
     # Import strands for the tool decorator
     try:
@@ -43,70 +121,56 @@ def load_tools_from_config(config: Dict[str, Any]) -> List:
         logger.error("Failed to import strands. Make sure it's installed.")
         return []
     
+    # Import the modules of tools not resolved before; imports spend most of
+    # their time in file I/O, so several can overlap
+    pending = [name for name in dict.fromkeys(enabled_tool_names) if name not in _TOOL_RESOLUTION_CACHE]
+    modules: Dict[str, Any] = {}
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(MAX_IMPORT_WORKERS, len(pending))) as executor:
+            modules = dict(zip(pending, executor.map(_import_tool_module, pending)))
+        
+        # Modules that import each other can deadlock when imported from several
+        # threads; retry every failed import serially before reporting it
+        for tool_name, module in modules.items():
+            if isinstance(module, Exception):
+                logger.debug("Retrying import of strands_tools.%s serially: %s", tool_name, module)
+                modules[tool_name] = _import_tool_module(tool_name)
+    
     # Import common tools from strands_tools
     for tool_name in enabled_tool_names:
+        # Modules don't change once imported, so reuse earlier resolutions
+        if tool_name in _TOOL_RESOLUTION_CACHE:
+            tool = _TOOL_RESOLUTION_CACHE[tool_name]
+            enabled_tools.append(tool)
+            loaded_by_name[tool_name] = tool
+            continue
+        
+        module = modules[tool_name]
+        if isinstance(module, ImportError):
+            logger.warning(f"Module for tool '{tool_name}' not found: {module}")
+            continue
+        if isinstance(module, Exception):
+            logger.error(f"Error loading tool '{tool_name}': {module}")
+            continue
+        
         try:
-            # Try to import the tool directly from its module
-            module_name = f"strands_tools.{tool_name}"
-            logger.info(f"Attempting to import {module_name}")
-            
-            # Dynamic import of the module
-            module = importlib.import_module(module_name)
-            
-            # First, look for a function with the same name as the module
-            if hasattr(module, tool_name):
-                tool_func = getattr(module, tool_name)
-                if callable(tool_func):
-                    if hasattr(tool_func, 'TOOL_SPEC'):
-                        logger.info(f"Found tool '{tool_name}' in module {module_name}")
-                        enabled_tools.append(tool_func)
-                    else:
-                        # Create a wrapper with the @tool decorator
-                        logger.info(f"Creating wrapper for tool '{tool_name}'")
-                        wrapped_tool = strands_tool(tool_func)
-                        enabled_tools.append(wrapped_tool)
-                    continue
-            
-            # If not found by name, look for any function with TOOL_SPEC attribute
-            tool_found = False
-            for attr_name in dir(module):
-                if not attr_name.startswith('_'):
-                    attr = getattr(module, attr_name)
-                    if callable(attr) and hasattr(attr, 'TOOL_SPEC'):
-                        logger.info(f"Found tool '{attr_name}' in module {module_name}")
-                        enabled_tools.append(attr)
-                        tool_found = True
-                        break
-            
-            # If still not found, look for any callable function that might be the tool
-            if not tool_found:
-                for attr_name in dir(module):
-                    if not attr_name.startswith('_'):
-                        attr = getattr(module, attr_name)
-                        if callable(attr) and not attr_name.startswith('_') and attr_name not in ['main', 'create_result_table', 'create_error_panel']:
-                            # Create a wrapper with the @tool decorator
-                            logger.info(f"Creating wrapper for function '{attr_name}' in module {module_name}")
-                            wrapped_tool = strands_tool(attr)
-                            enabled_tools.append(wrapped_tool)
-                            tool_found = True
-                            break
-                
-                if not tool_found:
-                    logger.warning(f"No suitable function found in module {module_name}")
+            tool = _resolve_tool(tool_name, module, strands_tool)
+            if tool is not None:
+                _TOOL_RESOLUTION_CACHE[tool_name] = tool
+                enabled_tools.append(tool)
+                loaded_by_name[tool_name] = tool
                 
-        except ImportError as e:
-            logger.warning(f"Module for tool '{tool_name}' not found: {e}")
         except Exception as e:
             logger.error(f"Error loading tool '{tool_name}': {e}")
     
     # Apply tool-specific configuration if available
-    for tool in enabled_tools:
-        tool_name = getattr(tool, '__name__', str(tool))
-        if tool_name in tool_options:
-            logger.info(f"Applying configuration for tool '{tool_name}'")
+    for tool_name in tool_options:
+        if tool_name in loaded_by_name:
+            logger.debug("Applying configuration for tool '%s'", tool_name)
             # Note: In a real implementation, you might need to handle this differently
             # depending on how the tools are designed to be configured
     
+    logger.info("Loaded %d of %d enabled tools", len(enabled_tools), len(enabled_tool_names))
     return enabled_tools
 
 def get_available_tool_names() -> List[str]:
@@ -127,11 +191,14 @@ def get_available_tool_names() -> List[str]:
         # Get the directory where strands_tools is installed
         strands_tools_dir = os.path.dirname(inspect.getfile(strands_tools))
         
-        # Get all Python files in the directory
-        for file in os.listdir(strands_tools_dir):
-            if file.endswith('.py') and not file.startswith('__'):
-                tool_name = file[:-3]  # Remove .py extension
-                tool_names.append(tool_name)
+        # Get all Python files in the directory; scandir entries carry their
+        # name and file type, so no extra stat per entry is needed
+        with os.scandir(strands_tools_dir) as entries:
+            tool_names = [
+                entry.name[:-3]  # Remove .py extension
+                for entry in entries
+                if entry.name.endswith('.py') and not entry.name.startswith('__') and entry.is_file()
+            ]
         
     except ImportError:
         logger.error("Failed to import strands_tools. Make sure it's installed.")
@@ -17,6 +17,9 @@ from strands.models import BedrockModel
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Module-level helpers that are never tools themselves
+_SKIP_ATTR_NAMES = frozenset({'main', 'create_result_table'})
+
 @tool
 def test_tool(message: str) -> dict:
     """
@@ -46,7 +49,7 @@ def load_tool_from_module(module_name: str, tool_name: Optional[str] = None) ->
     """
     try:
         # Import the module
-        logger.info(f"Attempting to import {module_name}")
+        logger.debug("Attempting to import %s", module_name)
         module = importlib.import_module(module_name)
         
         # If tool_name not provided, use last part of module name
@@ -58,33 +61,32 @@ def load_tool_from_module(module_name: str, tool_name: Optional[str] = None) ->
             tool_func = getattr(module, tool_name)
             if callable(tool_func):
                 if hasattr(tool_func, 'TOOL_SPEC'):
-                    logger.info(f"Found tool '{tool_name}' in module {module_name}")
+                    logger.debug("Found tool '%s' in module %s", tool_name, module_name)
                     return tool_func
                 else:
                     # Create a wrapper with the @tool decorator
-                    logger.info(f"Creating wrapper for tool '{tool_name}'")
-                    from strands import tool as strands_tool
-                    wrapped_tool = strands_tool(tool_func)
+                    logger.debug("Creating wrapper for tool '%s'", tool_name)
+                    wrapped_tool = tool(tool_func)
                     return wrapped_tool
         
-        # Second try: look for any function with TOOL_SPEC
-        for attr_name in dir(module):
-            if not attr_name.startswith('_'):
-                attr = getattr(module, attr_name)
-                if callable(attr) and hasattr(attr, 'TOOL_SPEC'):
-                    logger.info(f"Found tool '{attr_name}' in module {module_name}")
-                    return attr
+        # Second try: look for any function with TOOL_SPEC, remembering the
+        # first other callable for the third try in the same pass
+        fallback_name = fallback = None
+        for attr_name, attr in vars(module).items():
+            if attr_name.startswith('_') or not callable(attr):
+                continue
+            if hasattr(attr, 'TOOL_SPEC'):
+                logger.debug("Found tool '%s' in module %s", attr_name, module_name)
+                return attr
+            if fallback is None and attr_name not in _SKIP_ATTR_NAMES:
+                fallback_name, fallback = attr_name, attr
         
-        # Third try: look for any callable function
-        for attr_name in dir(module):
-            if not attr_name.startswith('_'):
-                attr = getattr(module, attr_name)
-                if callable(attr) and not attr_name.startswith('_') and attr_name not in ['main', 'create_result_table']:
-                    # Create a wrapper with the @tool decorator
-                    logger.info(f"Creating wrapper for function '{attr_name}' in module {module_name}")
-                    from strands import tool as strands_tool
-                    wrapped_tool = strands_tool(attr)
-                    return wrapped_tool
+        # Third try: use any callable function
+        if fallback is not None:
+            # Create a wrapper with the @tool decorator
+            logger.debug("Creating wrapper for function '%s' in module %s", fallback_name, module_name)
+            wrapped_tool = tool(fallback)
+            return wrapped_tool
         
         logger.warning(f"No suitable function found in module {module_name}")
         return None
@@ -151,7 +153,7 @@ def test_agent_with_tools(tools: List) -> None:
                 continue  # Already tested
                 
             tool_name = getattr(tool, '__name__', str(tool))
-            logger.info(f"Testing tool: {tool_name}")
+            logger.debug("Testing tool: %s", tool_name)
             
             try:
                 # Get the tool method from the agent
@@ -160,7 +162,7 @@ def test_agent_with_tools(tools: List) -> None:
                     # Try to call with minimal arguments - this will likely fail for most tools
                     # but it will show if the tool is properly registered
                     try:
-                        logger.info(f"Tool {tool_name} is available on agent")
+                        logger.debug("Tool %s is available on agent", tool_name)
                         # We don't actually call the tool as most will need specific arguments
                     except Exception as e:
                         logger.warning(f"Tool {tool_name} requires specific arguments: {e}")
@@ -0,0 +1,34 @@
+"""
+Shared fixture helpers for the Strands Web UI tests.
+"""
+
+import os
+import json
+import tempfile
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def dump_fixture(obj) -> bytes:
+    """Serialize a fixture to JSON bytes, with orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+
+def make_temp_dir() -> tempfile.TemporaryDirectory:
+    """Create a temporary directory for fixture files, on tmpfs when one exists."""
+    return tempfile.TemporaryDirectory(dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+
+
+def write_fixture(path, data: bytes):
+    """Write fixture bytes to a new file with a single raw os.write."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
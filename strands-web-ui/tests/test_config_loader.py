@@ -3,90 +3,123 @@ Tests for the configuration loader.
 """
 
 import os
-import json
-import tempfile
 import unittest
 
 from strands_web_ui.utils.config_loader import load_config, load_mcp_config
 
+from .helpers import dump_fixture, make_temp_dir, write_fixture
+
+# Fixture file contents, serialized once at import
+_CONFIG_BYTES = dump_fixture({
+    "model": {
+        "provider": "test-provider",
+        "model_id": "test-model",
+        "region": "test-region",
+        "max_tokens": 1000
+    },
+    "agent": {
+        "system_prompt": "Test prompt",
+        "max_parallel_tools": 2,
+        "record_direct_tool_call": False,
+        "hot_reload_tools": False,
+        "enable_native_thinking": False
+    },
+    "conversation": {
+        "window_size": 10,
+        "summarize_overflow": False
+    },
+    "ui": {
+        "update_interval": 0.5
+    }
+})
+
+_MCP_CONFIG_BYTES = dump_fixture({
+    "mcpServers": {
+        "test-server": {
+            "command": "echo",
+            "args": ["hello"],
+            "env": {}
+        }
+    }
+})
+
 
 class TestConfigLoader(unittest.TestCase):
     """Tests for the configuration loader."""
     
-    def setUp(self):
-        """Set up test fixtures."""
+    @classmethod
+    def setUpClass(cls):
+        """Set up test fixtures shared by every test; they are never modified."""
+        # One temporary directory holds both config files
+        cls.temp_dir = make_temp_dir()
+        
         # Create a temporary config file
-        self.temp_config = tempfile.NamedTemporaryFile(delete=False, mode='w+')
-        self.temp_config.write(json.dumps({
-            "model": {
-                "provider": "test-provider",
-                "model_id": "test-model",
-                "region": "test-region",
-                "max_tokens": 1000
-            },
-            "agent": {
-                "system_prompt": "Test prompt",
-                "max_parallel_tools": 2,
-                "record_direct_tool_call": False,
-                "hot_reload_tools": False,
-                "enable_native_thinking": False
-            },
-            "conversation": {
-                "window_size": 10,
-                "summarize_overflow": False
-            },
-            "ui": {
-                "update_interval": 0.5
-            }
-        }))
-        self.temp_config.close()
+        cls.config_path = os.path.join(cls.temp_dir.name, "config.json")
+        write_fixture(cls.config_path, _CONFIG_BYTES)
         
         # Create a temporary MCP config file
-        self.temp_mcp_config = tempfile.NamedTemporaryFile(delete=False, mode='w+')
-        self.temp_mcp_config.write(json.dumps({
-            "mcpServers": {
-                "test-server": {
-                    "command": "echo",
-                    "args": ["hello"],
-                    "env": {}
-                }
-            }
-        }))
-        self.temp_mcp_config.close()
+        cls.mcp_config_path = os.path.join(cls.temp_dir.name, "mcp_config.json")
+        write_fixture(cls.mcp_config_path, _MCP_CONFIG_BYTES)
     
-    def tearDown(self):
+    @classmethod
+    def tearDownClass(cls):
         """Tear down test fixtures."""
-        os.unlink(self.temp_config.name)
-        os.unlink(self.temp_mcp_config.name)
+        cls.temp_dir.cleanup()
     
     def test_load_config(self):
-        """Test loading configuration from a file."""
-        config = load_config(self.temp_config.name)
-        self.assertEqual(config["model"]["provider"], "test-provider")
-        self.assertEqual(config["model"]["model_id"], "test-model")
-        self.assertEqual(config["agent"]["system_prompt"], "Test prompt")
-        self.assertEqual(config["conversation"]["window_size"], 10)
-        self.assertEqual(config["ui"]["update_interval"], 0.5)
+        """Test loading configuration from a file, and the defaults when it is not found."""
+        cases = [
+            (self.config_path, {
+                ("model", "provider"): "test-provider",
+                ("model", "model_id"): "test-model",
+                ("agent", "system_prompt"): "Test prompt",
+                ("conversation", "window_size"): 10,
+                ("ui", "update_interval"): 0.5,
+            }),
+            ("non_existent_file.json", {
+                ("model", "provider"): "bedrock",
+                ("agent", "enable_native_thinking"): True,
+                ("conversation", "window_size"): 20,
+            }),
+        ]
+        for path, expected in cases:
+            with self.subTest(path=path):
+                config = load_config(path)
+                for (section, key), value in expected.items():
+                    self.assertEqual(config[section][key], value)
     
-    def test_load_config_default(self):
-        """Test loading default configuration when file not found."""
+    def test_load_config_default_is_a_copy(self):
+        """Test that mutating a default configuration does not affect later loads."""
         config = load_config("non_existent_file.json")
-        self.assertEqual(config["model"]["provider"], "bedrock")
-        self.assertTrue(config["agent"]["enable_native_thinking"])
-        self.assertEqual(config["conversation"]["window_size"], 20)
+        config["model"]["provider"] = "mutated"
+        self.assertEqual(load_config("non_existent_file.json")["model"]["provider"], "bedrock")
     
-    def test_load_mcp_config(self):
-        """Test loading MCP configuration from a file."""
-        config = load_mcp_config(self.temp_mcp_config.name)
-        self.assertIn("mcpServers", config)
-        self.assertIn("test-server", config["mcpServers"])
-        self.assertEqual(config["mcpServers"]["test-server"]["command"], "echo")
+    def test_load_config_reloads_on_change(self):
+        """Test that an edited config file is read again."""
+        # Edit a private copy; the class fixtures are shared
+        path = os.path.join(self.temp_dir.name, "edited_config.json")
+        self.addCleanup(os.unlink, path)
+        write_fixture(path, dump_fixture({"model": {"provider": "test-provider"}}))
+        self.assertEqual(load_config(path)["model"]["provider"], "test-provider")
+        write_fixture(path, dump_fixture({"model": {"provider": "edited-provider"}}))
+        # Make the edit visible even on filesystems with coarse mtimes
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 1))
+        self.assertEqual(load_config(path)["model"]["provider"], "edited-provider")
     
-    def test_load_mcp_config_default(self):
-        """Test loading default MCP configuration when file not found."""
-        config = load_mcp_config("non_existent_file.json")
-        self.assertIn("mcpServers", config)
-        self.assertEqual(len(config["mcpServers"]), 0)
+    def test_load_mcp_config(self):
+        """Test loading MCP configuration from a file, and the empty default when it is not found."""
+        # Expected server commands by server ID
+        cases = [
+            (self.mcp_config_path, {"test-server": "echo"}),
+            ("non_existent_file.json", {}),
+        ]
+        for path, expected in cases:
+            with self.subTest(path=path):
+                config = load_mcp_config(path)
+                self.assertIn("mcpServers", config)
+                commands = {server_id: server["command"] for server_id, server in config["mcpServers"].items()}
+                self.assertEqual(commands, expected)
 
 
 if __name__ == "__main__":
@@ -2,66 +2,88 @@
 Tests for the MCP server manager.
 """
 
+import copy
 import os
-import json
-import tempfile
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, Mock
 
 from strands_web_ui.mcp_server_manager import MCPServerManager
 
+from .helpers import dump_fixture, make_temp_dir, write_fixture
+
+# Fixture file contents, serialized once at import
+_CONFIG_BYTES = dump_fixture({
+    "mcpServers": {
+        "test-server": {
+            "command": "echo",
+            "args": ["hello"],
+            "env": {}
+        },
+        "disabled-server": {
+            "command": "echo",
+            "args": ["disabled"],
+            "env": {},
+            "disabled": True
+        }
+    }
+})
+
 
 class TestMCPServerManager(unittest.TestCase):
     """Tests for the MCP server manager."""
     
-    def setUp(self):
-        """Set up test fixtures."""
-        self.manager = MCPServerManager()
-        
+    @classmethod
+    def setUpClass(cls):
+        """Set up the config file shared by every test; it is never modified."""
         # Create a temporary config file
-        self.temp_config = tempfile.NamedTemporaryFile(delete=False, mode='w+')
-        self.temp_config.write(json.dumps({
-            "mcpServers": {
-                "test-server": {
-                    "command": "echo",
-                    "args": ["hello"],
-                    "env": {}
-                },
-                "disabled-server": {
-                    "command": "echo",
-                    "args": ["disabled"],
-                    "env": {},
-                    "disabled": True
-                }
-            }
-        }))
-        self.temp_config.close()
+        cls.temp_dir = make_temp_dir()
+        cls.config_path = os.path.join(cls.temp_dir.name, "mcp_config.json")
+        write_fixture(cls.config_path, _CONFIG_BYTES)
+        
+        # Patch the MCP client machinery once for the whole class
+        cls._patchers = [
+            patch("strands_web_ui.mcp_server_manager.MCPClient"),
+            patch("strands_web_ui.mcp_server_manager.stdio_client"),
+        ]
+        cls.mock_mcp_client, cls.mock_stdio_client = (p.start() for p in cls._patchers)
+        
+        # A manager with the config loaded, copied by tests that start from that state
+        cls._loaded_manager = MCPServerManager()
+        cls._loaded_manager.load_config(cls.config_path)
     
-    def tearDown(self):
+    @classmethod
+    def tearDownClass(cls):
         """Tear down test fixtures."""
-        os.unlink(self.temp_config.name)
+        for patcher in cls._patchers:
+            patcher.stop()
+        cls.temp_dir.cleanup()
+    
+    def setUp(self):
+        """Set up a manager with the config loaded and clean mocks for each test."""
+        self.mock_mcp_client.reset_mock(return_value=True, side_effect=True)
+        self.mock_stdio_client.reset_mock(return_value=True, side_effect=True)
+        self.manager = copy.deepcopy(self._loaded_manager)
     
     def test_load_config(self):
         """Test loading configuration from a file."""
-        result = self.manager.load_config(self.temp_config.name)
+        manager = MCPServerManager()
+        result = manager.load_config(self.config_path)
         self.assertTrue(result)
-        self.assertIn("test-server", self.manager.servers)
-        self.assertNotIn("disabled-server", self.manager.servers)
+        self.assertIn("test-server", manager.servers)
+        self.assertNotIn("disabled-server", manager.servers)
     
     def test_load_config_file_not_found(self):
         """Test loading configuration from a non-existent file."""
-        result = self.manager.load_config("non_existent_file.json")
+        result = MCPServerManager().load_config("non_existent_file.json")
         self.assertFalse(result)
     
     def test_get_server_ids(self):
         """Test getting server IDs."""
-        self.manager.load_config(self.temp_config.name)
         server_ids = self.manager.get_server_ids()
         self.assertEqual(server_ids, ["test-server"])
     
     def test_get_server_status(self):
         """Test getting server status."""
-        self.manager.load_config(self.temp_config.name)
         status = self.manager.get_server_status("test-server")
         self.assertTrue(status["exists"])
         self.assertFalse(status["connected"])
@@ -71,16 +93,13 @@ class TestMCPServerManager(unittest.TestCase):
         status = self.manager.get_server_status("non-existent-server")
         self.assertFalse(status.get("exists", True))
     
-    @patch("strands_web_ui.mcp_server_manager.MCPClient")
-    @patch("strands_web_ui.mcp_server_manager.stdio_client")
-    def test_connect_server(self, mock_stdio_client, mock_mcp_client):
+    def test_connect_server(self):
         """Test connecting to a server."""
         # Set up mocks
-        mock_server = MagicMock()
-        mock_mcp_client.return_value = mock_server
+        mock_server = Mock(spec=["start", "stop"])
+        self.mock_mcp_client.return_value = mock_server
         
-        # Load config and connect
-        self.manager.load_config(self.temp_config.name)
+        # Connect
         result = self.manager.connect_server("test-server")
         
         # Check results
@@ -88,16 +107,13 @@ class TestMCPServerManager(unittest.TestCase):
         self.assertIn("test-server", self.manager.active_servers)
         mock_server.start.assert_called_once()
     
-    @patch("strands_web_ui.mcp_server_manager.MCPClient")
-    @patch("strands_web_ui.mcp_server_manager.stdio_client")
-    def test_disconnect_server(self, mock_stdio_client, mock_mcp_client):
+    def test_disconnect_server(self):
         """Test disconnecting from a server."""
         # Set up mocks
-        mock_server = MagicMock()
-        mock_mcp_client.return_value = mock_server
+        mock_server = Mock(spec=["start", "stop"])
+        self.mock_mcp_client.return_value = mock_server
         
-        # Load config and connect
-        self.manager.load_config(self.temp_config.name)
+        # Connect
         self.manager.connect_server("test-server")
         
         # Disconnect
@@ -108,6 +124,21 @@ class TestMCPServerManager(unittest.TestCase):
         self.assertNotIn("test-server", self.manager.active_servers)
         mock_server.stop.assert_called_once()
     
+    def test_get_all_tools_is_cached(self):
+        """Test that tools are fetched once until the server set changes."""
+        mock_server = Mock(spec=["list_tools_sync", "stop"])
+        mock_server.list_tools_sync.return_value = ["tool-a", "tool-b"]
+        
+        self.manager.active_servers["test-server"] = mock_server
+        
+        self.assertEqual(self.manager.get_all_tools(), ["tool-a", "tool-b"])
+        self.assertEqual(self.manager.get_all_tools(), ["tool-a", "tool-b"])
+        mock_server.list_tools_sync.assert_called_once()
+        
+        # Disconnecting invalidates the cache
+        self.manager.disconnect_server("test-server")
+        self.assertEqual(self.manager.get_all_tools(), [])
+    
     def test_disconnect_non_existent_server(self):
         """Test disconnecting from a non-existent server."""
         result = self.manager.disconnect_server("non-existent-server")